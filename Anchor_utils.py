@@ -24,16 +24,19 @@
 import os
 import json
 import re
-import toml
 import importlib
 import importlib.util
-from based58 import b58encode
-from solders.pubkey import Pubkey
 from solana_module.solana_utils import solana_base_path, choose_wallet, load_keypair_from_file, selection_menu
 
 
 anchor_base_path = f"{solana_base_path}/anchor_module"
 
+# Compiled IDLs, keyed by IDL file path
+_compiled_idls = dict()
+
+# Loaded keypairs and their file modification time, keyed by wallet file path
+_keypairs = dict()
+
 
 # ====================================================
 # PUBLIC FUNCTIONS
@@ -71,9 +74,7 @@ def fetch_required_accounts(instruction, idl):
     instruction_dict = next(instr for instr in idl['instructions'] if instr['name'] == instruction)
 
     # Extract required accounts, excluding the systemProgram
-    required_accounts = [_camel_to_snake(account['name']) for account in instruction_dict['accounts'] if account['name'] != 'systemProgram']
-
-    return required_accounts
+    return _extract_required_accounts(instruction_dict)
 
 def choose_program():
     programs = fetch_initialized_programs()
@@ -92,6 +93,8 @@ def choose_instruction(idl):
         return selection_menu('instruction', instructions)
 
 def fetch_cluster(program_name):
+    import toml
+
     file_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"
     config = toml.load(file_path)
     cluster = config['provider']['cluster']
@@ -106,16 +109,45 @@ def load_idl(file_path):
     with open(file_path, 'r') as f:
         return json.load(f)
 
+def load_compiled_idl(file_path):
+    # Reuse the compiled IDL as long as the file has not been modified
+    mtime = os.path.getmtime(file_path)
+    compiled_idl = _compiled_idls.get(file_path)
+    if compiled_idl is not None and compiled_idl['mtime'] == mtime:
+        return compiled_idl
+
+    compiled_idl = _compile_idl(load_idl(file_path))
+    compiled_idl['mtime'] = mtime
+    _compiled_idls[file_path] = compiled_idl
+    return compiled_idl
+
+def load_cached_keypair(file_path):
+    # Reuse the keypair as long as the wallet file has not been modified
+    try:
+        mtime = os.path.getmtime(file_path)
+    except OSError:
+        return None
+    cached = _keypairs.get(file_path)
+    if cached is not None and cached[1] == mtime:
+        return cached[0]
+
+    keypair = load_keypair_from_file(file_path)
+    if keypair is not None:
+        _keypairs[file_path] = (keypair, mtime)
+    return keypair
+
 def fetch_signer_accounts(instruction, idl):
     # Find the instruction in the IDL
     instruction_dict = next(instr for instr in idl['instructions'] if instr['name'] == instruction)
 
     # Extract signer accounts
-    required_signer_accounts = [account['name'] for account in instruction_dict['accounts'] if account['isSigner']]
-
-    return required_signer_accounts
+    return _extract_signer_accounts(instruction_dict)
 
 def generate_pda(program_name, launched_from_utilities):
+    # Only needed by the interactive PDA generation, imported here to keep startup fast
+    from based58 import b58encode
+    from solders.pubkey import Pubkey
+
     pda_key = ''
     allowed_choices = ['1','2','0']
     if not launched_from_utilities:
@@ -161,9 +193,7 @@ def fetch_args(instruction, idl):
     instruction_dict = next(instr for instr in idl['instructions'] if instr['name'] == instruction)
 
     # Extract args
-    required_args = [{'name': _camel_to_snake(arg['name']), 'type': arg['type']} for arg in instruction_dict['args']]
-
-    return required_args
+    return _extract_args(instruction_dict)
 
 def check_if_array(arg):
     if isinstance(arg['type'], dict) and 'array' in arg['type']:
@@ -219,6 +249,41 @@ def _camel_to_snake(camel_str):
     # Converto to lower case the whole string, leaving only the first letter as it is
     return snake_str[0] + snake_str[1:].lower()
 
+def _extract_required_accounts(instruction_dict):
+    return [_camel_to_snake(account['name']) for account in instruction_dict['accounts'] if account['name'] != 'systemProgram']
+
+def _extract_signer_accounts(instruction_dict):
+    return [account['name'] for account in instruction_dict['accounts'] if account['isSigner']]
+
+def _extract_writable_accounts(instruction_dict):
+    # Accounts without mutability information are considered writable
+    return [_camel_to_snake(account['name']) for account in instruction_dict['accounts'] if account.get('isMut', True)]
+
+def _extract_args(instruction_dict):
+    return [{'name': _camel_to_snake(arg['name']), 'type': arg['type']} for arg in instruction_dict['args']]
+
+def _compile_idl(idl):
+    # Precompute, for each instruction, everything the execution trace runner needs
+    instructions = dict()
+    for instruction_dict in idl['instructions']:
+        args = _extract_args(instruction_dict)
+        for arg in args:
+            arg['array_type'], arg['array_length'] = check_if_array(arg)
+            arg['checked_type'] = check_type(arg['type'])
+
+        instructions[instruction_dict['name']] = {
+            'required_accounts': _extract_required_accounts(instruction_dict),
+            # Same naming as the other account lists, so that they can be compared with each other
+            'signer_accounts': [_camel_to_snake(account) for account in _extract_signer_accounts(instruction_dict)],
+            'writable_accounts': _extract_writable_accounts(instruction_dict),
+            'args': args
+        }
+
+    return {
+        'idl': idl,
+        'instructions': instructions
+    }
+
 def _choose_number_of_seed(program_name):
     pda_key = None
     repeat = True
@@ -233,6 +298,8 @@ def _choose_number_of_seed(program_name):
     return pda_key, False
 
 def _manage_seed_insertion(program_name, n_seeds):
+    from solders.pubkey import Pubkey
+
     # Dynamically import program id
     module_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchorpy_files/program_id.py"
     spec = importlib.util.spec_from_file_location("program_id", module_path)
@@ -259,7 +326,7 @@ def _manage_seed_insertion(program_name, n_seeds):
             if choice == "1":
                 chosen_wallet = choose_wallet()
                 if chosen_wallet is not None:
-                    keypair = load_keypair_from_file(f"{solana_base_path}/solana_wallets/{chosen_wallet}")
+                    keypair = load_cached_keypair(f"{solana_base_path}/solana_wallets/{chosen_wallet}")
                     seed = keypair.pubkey()
                     seeds[i] = bytes(seed)
                     i += 1
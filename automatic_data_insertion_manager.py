@@ -1,233 +1,431 @@
+import argparse
+import asyncio
 import csv
+import json
 import os
-import re
-import asyncio
-from solders.pubkey import Pubkey
-from anchorpy import Wallet, Provider
-from solana_module.anchor_module.transaction_manager import build_transaction, measure_transaction_size, \
-    compute_transaction_fees, send_transaction
-from solana_module.solana_utils import load_keypair_from_file, solana_base_path, create_client, selection_menu
-from solana_module.anchor_module.anchor_utils import anchor_base_path, fetch_initialized_programs, \
-    fetch_program_instructions, fetch_required_accounts, fetch_signer_accounts, fetch_args, check_type, convert_type, \
-    fetch_cluster, load_idl, check_if_array
-
-from spl.token.async_client import AsyncToken
-from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
-from solders.pubkey import Pubkey as SoldersPubkey
-from solana.rpc.async_api import AsyncClient
+import random
+import time
+from solana_module.anchor_module.transaction_manager import measure_transaction_size, compute_transaction_fees, \
+    send_transaction, build_instruction, build_packed_transaction, estimate_packed_transaction_size, \
+    placeholder_blockhash, PACKET_DATA_SIZE
+from solana_module.solana_utils import selection_menu
+from solana_module.anchor_module.anchor_utils import anchor_base_path, fetch_initialized_programs
+from solana_module.anchor_module.trace_compiler import load_or_compile_trace, read_plan, step_to_job, hash_plan
+from solana_module.anchor_module.compute_units import configure_simulation, load_simulation_cache, \
+    save_simulation_cache, simulation_cache_key, simulate_compute_units
+from solana_module.anchor_module.run_metrics import configure_metrics, reset_metrics, measure_stage, log_row, \
+    log_message, row_completed, finish_live_summary, export_metrics
+from solana_module.anchor_module.trace_scheduler import run_scheduled
+from solana_module.anchor_module.client_pool import get_client, close_clients, set_endpoint_override
+from solana_module.anchor_module.blockhash_provider import configure_blockhash_provider, start_blockhash_refresh, \
+    stop_blockhash_refresh
+from solana_module.anchor_module.slot_clock import wait_for_slots
+from solana_module.anchor_module.confirmation_tracker import confirm_signature, stop_confirmation_tracking
+from solana_module.anchor_module.lookup_tables import get_lookup_table, record_key_usage, automatic_lookup_table, \
+    reset_lookup_tables
+from solana_module.anchor_module.fee_model import lamports_per_signature, verify_transaction_fee, \
+    fee_verification_summary, reset_fee_verification
+
+
+# Columns of the results file
+_RESULTS_HEADER = [
+    'Trace_ID',
+    'Transaction_Size_Bytes',
+    'Size_Without_Lookup_Tables_Bytes',
+    'Size_With_Lookup_Tables_Bytes',
+    'Transaction_Fees_Lamports',
+    'Transaction_Hash_or_Status',
+    'Confirmation_Status',
+    'Confirmation_Slot',
+    'Confirmation_Latency_Seconds',
+    'Packed_Trace_IDs',
+    'Compute_Units_Consumed',
+    'Simulation_Error'
+]
+
+# Each instruction gets 200k compute units by default, out of the 1.4M available to a transaction
+_MAX_PACKED_INSTRUCTIONS = 7
 
 # ====================================================
 # PUBLIC FUNCTIONS
 # ====================================================
 
-async def run_execution_trace():
+async def run_execution_trace(max_concurrency=1, offline_fees=False, fee_verify_fraction=0.0, offline=False,
+                              websocket_endpoint=None, resume=False, pack=False, auto_lookup_table=False,
+                              rpc_endpoint=None, live_summary=False, simulate=False, simulation_concurrency=8,
+                              simulation_cache=False, blockhash_ttl=20, blockhash_commitment=None):
     # Fetch initialized programs
     initialized_programs = fetch_initialized_programs()
     if len(initialized_programs) == 0:
         print("No program has been initialized yet.")
         return
 
-    results = []
-
     execution_traces = _find_execution_traces()
     file_name = selection_menu('execution trace', execution_traces)
     if file_name is None:
         return
-    csv_file = _read_csv(f"{anchor_base_path}/execution_traces/{file_name}")
-
-    # Create async client outside the loop
-    client = AsyncClient("https://api.devnet.solana.com")
-
-    try:  # CORREZIONE: Aggiungere try-finally per garantire la chiusura del client
-        # For each execution trace
-        for index, row in enumerate(csv_file, start=1):
-            # Check if it's a slot waiting command
-            if row[0].startswith("S:"):
-                extracted_key = row[0].removeprefix('S:').strip()
-                target_slot = int(extracted_key)
-
-                # Await the async call
-                first_response = await client.get_slot()
-                first_current_slot = first_response.value
-
-                target_end_slot = first_current_slot + target_slot
-
-                print(f"Waiting for slot {target_slot} ...")
-
-                while True:
-                    try:
-                        # Await the async call
-                        response = await client.get_slot()
-                        current_slot = response.value
-                        current_value = target_end_slot - current_slot
-
-                        if current_value <= 0:
-                            print(f"Target reached! Current slot: {target_slot - current_value}, target was: {target_slot}")
-                            break
-
-                        print(f"Current slot: {target_slot - current_value}, target slot: {target_slot}")
-                        
-                        # Use asyncio.sleep instead of time.sleep for async functions
-                        await asyncio.sleep(1)
-
-                    except Exception as e:
-                        print(f"Error checking slot: {e}")
-                        await asyncio.sleep(2)
-
-                continue  # Skip to next iteration
-
-            # Normal execution trace processing
-            execution_trace = [x.strip() for x in re.split(r"[;,]", row[0])]
-
-           
-            
-            # Get execution trace ID
-            trace_id = execution_trace[0]
-            print(f"Working on execution trace with ID {trace_id}...")
-
-            # Manage program
-            program_name = execution_trace[1]
-            if program_name not in initialized_programs:
-                print(f"Program {program_name} not initialized yet (execution trace {trace_id}).")
-                return
 
-            # Manage instruction
-            idl_file_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
-            idl = load_idl(idl_file_path)
-            instructions = fetch_program_instructions(idl)
-            instruction = execution_trace[2]
-            if instruction not in instructions:
-                print(f"Instruction {instruction} not found for the program {program_name} (execution trace {trace_id}).")
-
-            # Manage accounts
-            required_accounts = fetch_required_accounts(instruction, idl)
-            signer_accounts = fetch_signer_accounts(instruction, idl)
-            final_accounts = dict()
-            signer_accounts_keypairs = dict()
-            i = 3
-            for account in required_accounts:
-                # If it is a wallet
-                if execution_trace[i].startswith("W:"):
-                    wallet_name = execution_trace[i].removeprefix('W:')
-                    file_path = f"{solana_base_path}/solana_wallets/{wallet_name}"
-                    keypair = load_keypair_from_file(file_path)
-                    if keypair is None:
-                        print(f"Wallet for account {account} not found at path {file_path}.")
-                        return
-                    if account in signer_accounts:
-                        signer_accounts_keypairs[account] = keypair
-                    final_accounts[account] = keypair.pubkey()
-                # If it is a PDA
-                elif execution_trace[i].startswith("P:"):
-                    extracted_key = execution_trace[i].removeprefix('P:')
-                    try:
-                        pda_key = Pubkey.from_string(extracted_key)
-                        final_accounts[account] = pda_key
-                    except Exception as e:
-                        print(f"Invalid PDA key format for account {account}: {extracted_key}. Error: {e}")
-                        return
-                # If it is a Token Account (manual input)
-                elif execution_trace[i].startswith("T:"):
-                    extracted_key = execution_trace[i].removeprefix('T:')
-                    try:
-                        token_account_key = Pubkey.from_string(extracted_key)
-                        final_accounts[account] = token_account_key
-                        print(f"Token account {account} added with address: {token_account_key}")
-                    except Exception as e:
-                        print(f"Invalid token account key format for account {account}: {extracted_key}. Error: {e}")
-                        return
-                else:
-                    print(f"Invalid account prefix for account {account}. Expected 'W:', 'P:', or 'T:' but got: {execution_trace[i]}")
-                    print("Please use:")
-                    print("  - 'W:wallet_name' for wallet accounts")
-                    print("  - 'P:pda_address' for PDA accounts")
-                    print("  - 'T:token_account_address' for token accounts")
-                    return
-                i += 1
-
-            # Manage args
-            required_args = fetch_args(instruction, idl)
-            final_args = dict()
-            for arg in required_args:
-                # Manage arrays
-                array_type, array_length = check_if_array(arg)
-                if array_type is not None and array_length is not None:
-                    array_values = execution_trace[i].split()
-
-                    # Check if array has correct length
-                    if len(array_values) != array_length:
-                        print(f"Error: Expected array of length {array_length}, but got {len(array_values)}")
-                        return
-
-                    # Convert array elements basing on the type
-                    valid_values = []
-                    for j in range(len(array_values)):
-                        converted_value = convert_type(array_type, array_values[j])
-                        if converted_value is not None:
-                            valid_values.append(converted_value)
-                        else:
-                            print(f"Invalid input at index {j}. Please try again.")
-                            return
-
-                    final_args[arg['name']] = valid_values
-
-                # Manage classical args
-                else:
-                    type = check_type(arg["type"])
-                    if type is None:
-                        print(f"Unsupported type for arg {arg['name']}")
-                        return
-                    converted_value = convert_type(type, execution_trace[i])
-                    final_args[arg['name']] = converted_value
-
-                i += 1
-
-            # Manage provider
-            provider_keypair_path = f"{solana_base_path}/solana_wallets/{execution_trace[i]}"
-            keypair = load_keypair_from_file(provider_keypair_path)
-            if keypair is None:
-                print("Provider wallet not found.")
-            cluster, is_deployed = fetch_cluster(program_name)
-            # NOTA: Qui crei un nuovo client, ma stai già usando quello async per gli slot
-            client_for_transaction = create_client(cluster)  # Rinominato per chiarezza
-            provider_wallet = Wallet(keypair)
-            provider = Provider(client_for_transaction, provider_wallet)
-
-            # Manage transaction
-            transaction = await build_transaction(program_name, instruction, final_accounts, final_args, 
-                                                signer_accounts_keypairs, client_for_transaction, provider)
-            size = measure_transaction_size(transaction)
-            fees = await compute_transaction_fees(client_for_transaction, transaction)
-
-            # CSV building
-            csv_row = [trace_id, size, fees]
-
-            i += 1
-            if execution_trace[i].lower() == 'true':
-                if is_deployed:
-                    transaction_hash = await send_transaction(provider, transaction)
-                    csv_row.append(transaction_hash)
-                else:
-                    csv_row.append('Program not deployed with toolchain')
-
-            # Append results
-            results.append(csv_row)
-            print(f"Execution trace {index} results computed!")
+    # Time spent in each stage is collected for the whole run, including the trace compilation
+    configure_metrics(live=live_summary)
+    reset_metrics()
 
-    finally:
-        # CORREZIONE: Chiudere il client alla fine, fuori dal loop
-        await client.close()
+    # The whole trace is validated before anything is executed
+    plan_path = load_or_compile_trace(f"{anchor_base_path}/execution_traces/{file_name}", initialized_programs)
+    if plan_path is None:
+        return
 
-    # CSV writing
+    # Results are written as soon as they are computed. When resuming, completed rows are skipped
     file_name_without_extension = file_name.removesuffix(".csv")
-    file_path = _write_csv(file_name_without_extension, results)
-    print(f"Results written successfully to {file_path}")
+    results_file = open_results_file(file_name_without_extension, resume, hash_plan(plan_path))
+    if results_file['last_row'] > 0:
+        print(f"Resuming after row {results_file['last_row']} (execution trace {results_file['last_trace_id']}).")
+
+    options = run_options(offline_fees, fee_verify_fraction, offline, websocket_endpoint, pack, auto_lookup_table,
+                          rpc_endpoint, simulate, simulation_concurrency, simulation_cache, blockhash_ttl,
+                          blockhash_commitment)
+    try:
+        done = await execute_plan(plan_path, results_file, options, max_concurrency)
+    finally:
+        close_results_file(results_file)
+        metrics_files = export_metrics(f"{anchor_base_path}/execution_traces_results/{file_name_without_extension}_metrics")
+        print(f"Stage timings written to {metrics_files[0]} and {metrics_files[1]}")
+
+    if not done:
+        print(f"Execution stopped. Completed rows are saved in {results_file['path']}, run again with --resume to continue.")
+        return
+
+    if options['offline_fees'] and options['fee_verify_fraction'] > 0:
+        checked, mismatches = fee_verification_summary()
+        print(f"Offline fees verified on {checked} rows, {len(mismatches)} mismatches found.")
+
+    print(f"Results written successfully to {results_file['path']}")
+
+def run_options(offline_fees=False, fee_verify_fraction=0.0, offline=False, websocket_endpoint=None, pack=False,
+                auto_lookup_table=False, rpc_endpoint=None, simulate=False, simulation_concurrency=8,
+                simulation_cache=False, blockhash_ttl=20, blockhash_commitment=None):
+    return {
+        'offline': offline,  # Measure size and fees without any cluster connection
+        'offline_fees': offline_fees or offline,  # Compute fees with the local fee model instead of the RPC
+        'fee_verify_fraction': 0.0 if offline else fee_verify_fraction,  # Fraction of offline fees checked against the RPC
+        'websocket_endpoint': websocket_endpoint,  # Endpoint used to subscribe to slot updates during S: rows
+        'pack': pack,  # Send consecutive compatible rows in a single transaction
+        'auto_lookup_table': auto_lookup_table,  # Measure the size saved by a table of the most used keys
+        'rpc_endpoint': rpc_endpoint,  # Send all the RPC requests to this endpoint, e.g. the rpc_stub_server stand-in
+        'simulate': simulate and not offline,  # Measure compute units, and do not send rows failing the simulation
+        'simulation_concurrency': simulation_concurrency,  # Simulations running at the same time
+        'simulation_cache': simulation_cache,  # Reuse compute units of rows simulated in previous runs
+        'blockhash_ttl': blockhash_ttl,  # Seconds a fetched blockhash is reused for
+        'blockhash_commitment': blockhash_commitment  # Commitment of the fetched blockhash, None uses the client default
+    }
+
+async def execute_plan(plan_path, results_file, options, max_concurrency=1):
+    # Execute the rows of a compiled plan not completed yet, appending their results. Returns False if stopped
+    reset_fee_verification()
+    reset_lookup_tables()
+    configure_simulation(options['simulation_concurrency'])
+    configure_blockhash_provider(options['blockhash_ttl'], options['blockhash_commitment'])
+    if options['simulate'] and options['simulation_cache']:
+        load_simulation_cache(f"{anchor_base_path}/.simulation_cache.json")
+    set_endpoint_override(options['rpc_endpoint'])
+
+    try:
+        # Rows touching disjoint accounts are executed concurrently, results are kept in trace order
+        jobs = _generate_trace_jobs(read_plan(plan_path), results_file['last_row'], options['auto_lookup_table'])
+        if options['pack']:
+            # Consecutive compatible rows are sent in a single transaction
+            jobs = _pack_trace_jobs(jobs)
+        worker = lambda job, semaphore: _execute_trace_job(job, semaphore, options)
+        on_result = lambda job, rows: _on_job_completed(results_file, job, rows)
+        return await run_scheduled(jobs, worker, max_concurrency, on_result)
+
+    finally:
+        finish_live_summary()
+        # Close pooled clients once the whole trace has been executed
+        await stop_confirmation_tracking()
+        await stop_blockhash_refresh()
+        await close_clients()
+        set_endpoint_override(None)
+        save_simulation_cache()
+
+def open_results_file(file_name, resume, plan_hash):
+    folder = f'{anchor_base_path}/execution_traces_results/'
+    csv_file = os.path.join(folder, f'{file_name}_results.csv')
+    checkpoint_file = os.path.join(folder, f'{file_name}_results.checkpoint')
+
+    # Create folder if it doesn't exist
+    os.makedirs(folder, exist_ok=True)
+
+    # Read the checkpoint left by a previous run
+    checkpoint = None
+    if resume and os.path.exists(checkpoint_file) and os.path.exists(csv_file):
+        with open(checkpoint_file, 'r') as file:
+            checkpoint = json.load(file)
+
+    # A checkpoint of another trace, or of an edited one, would skip rows that were never executed
+    if checkpoint is not None and checkpoint.get('plan_hash') != plan_hash:
+        print("Execution trace changed since the checkpoint was saved, starting from the first row.")
+        checkpoint = None
+
+    # A checkpoint past the end of the file does not belong to it, the file is started again
+    if checkpoint is not None and checkpoint['offset'] > os.path.getsize(csv_file):
+        print("Checkpoint does not match the results file, starting from the first row.")
+        checkpoint = None
+
+    if checkpoint is not None:
+        # Drop rows written after the last checkpoint, they will be computed again
+        file = open(csv_file, mode='r+', newline='')
+        file.seek(checkpoint['offset'])
+        file.truncate()
+    else:
+        # The checkpoint of a previous run would point into the old file
+        if os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+        file = open(csv_file, mode='w', newline='')
+        checkpoint = {'row': 0, 'trace_id': None, 'offset': 0, 'plan_hash': plan_hash}
+
+        # Write header row with field descriptions
+        csv.writer(file).writerow(_RESULTS_HEADER)
+        file.flush()
+
+    return {
+        'path': csv_file,
+        'checkpoint_path': checkpoint_file,
+        'plan_hash': plan_hash,
+        'file': file,
+        'writer': csv.DictWriter(file, fieldnames=_RESULTS_HEADER, restval=''),
+        'last_row': checkpoint['row'],
+        'last_trace_id': checkpoint['trace_id']
+    }
+
+def append_results(results_file, job, rows):
+    # Write results
+    for row in rows:
+        results_file['writer'].writerow(row)
+    results_file['file'].flush()
+
+    # Record the last completed row, together with the results file length at that point
+    results_file['last_row'] = job['index']
+    results_file['last_trace_id'] = job.get('trace_id', results_file['last_trace_id'])
+    checkpoint = {'row': results_file['last_row'], 'trace_id': results_file['last_trace_id'],
+                  'offset': results_file['file'].tell(), 'plan_hash': results_file['plan_hash']}
+    temporary_checkpoint_file = f"{results_file['checkpoint_path']}.tmp"
+    with open(temporary_checkpoint_file, 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary_checkpoint_file, results_file['checkpoint_path'])
+
+def close_results_file(results_file):
+    results_file['file'].close()
 
 
 # ====================================================
 # PRIVATE FUNCTIONS
 # ====================================================
 
+def _generate_trace_jobs(steps, last_completed_row=0, use_automatic_lookup_table=False):
+    from solders.pubkey import Pubkey
+
+    lookup_table_addresses = []
+
+    # For each execution trace not completed yet
+    for step in steps:
+        # Lookup table rows apply to all the following rows, so they are read also when resuming
+        if step['kind'] == 'lookup_table':
+            lookup_table_addresses = lookup_table_addresses + [Pubkey.from_string(step['address'])]
+            continue
+
+        if step['index'] <= last_completed_row:
+            continue
+        job = step_to_job(step)
+
+        if job is not None and job['kind'] == 'instruction':
+            log_row(f"Working on execution trace with ID {job['trace_id']}...")
+            job['lookup_table_addresses'] = lookup_table_addresses
+            # Frequently used keys are collected in a local table, to measure the size it would save
+            if use_automatic_lookup_table:
+                record_key_usage(job['accounts'].values())
+                job['automatic_lookup_table'] = automatic_lookup_table()
+
+        yield job
+        if job is None:
+            return
+
+def _pack_trace_jobs(jobs):
+    pack = None
+    for job in jobs:
+        # Slot waits and errors close the current pack
+        if job is None or job['kind'] == 'slot':
+            if pack is not None:
+                yield _close_pack(pack)
+                pack = None
+            yield job
+            if job is None:
+                return
+            continue
+
+        # Add the row to the current pack if the resulting transaction still fits in a packet
+        _get_instruction(job)
+        if pack is not None and _can_pack(pack, job):
+            instructions = [packed_job['ix'] for packed_job in pack['jobs']] + [job['ix']]
+            if estimate_packed_transaction_size(instructions, job['provider_keypair']) <= PACKET_DATA_SIZE:
+                pack['jobs'].append(job)
+                pack['index'] = job['index']
+                pack['trace_id'] = job['trace_id']
+                pack['automatic_lookup_table'] = job.get('automatic_lookup_table')
+                pack['writable_keys'] |= job['writable_keys']
+                pack['readonly_keys'] |= job['readonly_keys']
+                continue
+
+        if pack is not None:
+            yield _close_pack(pack)
+        pack = {
+            'kind': 'pack',
+            'index': job['index'],
+            'trace_id': job['trace_id'],
+            'jobs': [job],
+            'provider_keypair': job['provider_keypair'],
+            'cluster': job['cluster'],
+            'is_deployed': job['is_deployed'],
+            'send': job['send'],
+            'lookup_table_addresses': job['lookup_table_addresses'],
+            'automatic_lookup_table': job.get('automatic_lookup_table'),
+            'writable_keys': set(job['writable_keys']),
+            'readonly_keys': set(job['readonly_keys'])
+        }
+
+    if pack is not None:
+        yield _close_pack(pack)
+
+def _can_pack(pack, job):
+    # Rows are compatible if they share payer, cluster and send behaviour
+    return (len(pack['jobs']) < _MAX_PACKED_INSTRUCTIONS
+            and pack['provider_keypair'].pubkey() == job['provider_keypair'].pubkey()
+            and pack['cluster'] == job['cluster']
+            and pack['is_deployed'] == job['is_deployed']
+            and pack['send'] == job['send']
+            and pack['lookup_table_addresses'] == job['lookup_table_addresses'])
+
+def _close_pack(pack):
+    # A pack with a single row is executed as a normal row
+    if len(pack['jobs']) == 1:
+        return pack['jobs'][0]
+    return pack
+
+async def _execute_trace_job(job, semaphore, options):
+    # anchorpy and the RPC stack are only imported once a transaction has to be built
+    from anchorpy import Wallet, Provider
+    from solana.rpc.commitment import Processed
+    from solana.rpc.types import TxOpts
+
+    if job['kind'] == 'slot':
+        if options['offline']:
+            log_message(f"Offline mode: skipping wait for {job['slots']} slots.")
+        else:
+            with measure_stage('slot_wait'):
+                await wait_for_slots(get_client('Devnet'), job['slots'], options['websocket_endpoint'])
+        return []
+
+    async with semaphore:
+        # Clients are shared across rows of the same cluster. Offline, a placeholder blockhash is used
+        if options['offline']:
+            client_for_transaction = None
+            recent_blockhash = placeholder_blockhash()
+        else:
+            client_for_transaction = get_client(job['cluster'])
+            start_blockhash_refresh(client_for_transaction)
+            recent_blockhash = None
+        provider_wallet = Wallet(job['provider_keypair'])
+        provider = Provider(client_for_transaction, provider_wallet)
+
+        # Lookup tables referenced by the trace can only be fetched with a cluster connection
+        lookup_tables = []
+        if not options['offline']:
+            for address in job['lookup_table_addresses']:
+                with measure_stage('lookup_table_fetch'):
+                    lookup_table = await get_lookup_table(client_for_transaction, address)
+                if lookup_table is not None:
+                    lookup_tables.append(lookup_table)
+
+        # Manage transaction
+        trace_jobs = job['jobs'] if job['kind'] == 'pack' else [job]
+        instructions = [_get_instruction(trace_job) for trace_job in trace_jobs]
+        signer_keypairs = [keypair for trace_job in trace_jobs for keypair in trace_job['signer_accounts_keypairs'].values()]
+        transaction = await build_packed_transaction(instructions, signer_keypairs, client_for_transaction, provider,
+                                                     recent_blockhash, lookup_tables)
+        size = measure_transaction_size(transaction)
+        fees = await compute_transaction_fees(client_for_transaction, transaction, options['offline_fees'],
+                                              lamports_per_signature(job['cluster']))
+        if options['offline_fees'] and random.random() < options['fee_verify_fraction']:
+            await verify_transaction_fee(client_for_transaction, transaction.message, fees, job['trace_id'])
+
+        # CSV building
+        csv_row = {
+            'Trace_ID': job['trace_id'],
+            'Transaction_Size_Bytes': size,
+            'Transaction_Fees_Lamports': fees
+        }
+
+        # Compare the size with and without lookup tables, including the automatic one
+        comparison_lookup_tables = list(lookup_tables)
+        if job.get('automatic_lookup_table') is not None:
+            comparison_lookup_tables.append(job['automatic_lookup_table'])
+        if comparison_lookup_tables:
+            payer = job['provider_keypair']
+            csv_row['Size_Without_Lookup_Tables_Bytes'] = estimate_packed_transaction_size(instructions, payer)
+            csv_row['Size_With_Lookup_Tables_Bytes'] = estimate_packed_transaction_size(instructions, payer,
+                                                                                        comparison_lookup_tables)
+
+    # Simulations run outside the row semaphore, limited only by their own pool, so that failures are found
+    # before sending
+    simulation = None
+    if options['simulate']:
+        cache_key = simulation_cache_key(trace_jobs) if options['simulation_cache'] else None
+        simulation = await simulate_compute_units(client_for_transaction, transaction, cache_key)
+        csv_row['Compute_Units_Consumed'] = simulation['units']
+        csv_row['Simulation_Error'] = simulation['error']
+
+    transaction_hash = None
+    if job['send']:
+        if options['offline']:
+            csv_row['Transaction_Hash_or_Status'] = 'Not sent in offline mode'
+        elif simulation is not None and simulation['error'] is not None:
+            csv_row['Transaction_Hash_or_Status'] = 'Not sent, simulation failed'
+        elif job['is_deployed']:
+            async with semaphore:
+                submitted_at = time.monotonic()
+                # Sent without waiting, the confirmation is tracked in batches
+                send_options = TxOpts(skip_confirmation=True, preflight_commitment=Processed)
+                transaction_hash = await send_transaction(provider, transaction, send_options)
+            csv_row['Transaction_Hash_or_Status'] = transaction_hash
+        else:
+            csv_row['Transaction_Hash_or_Status'] = 'Program not deployed with toolchain'
+
+    # Wait for the transaction to land, outside the semaphore so other rows can be sent meanwhile
+    if transaction_hash is not None:
+        with measure_stage('confirmation'):
+            confirmation = await confirm_signature(client_for_transaction, transaction_hash, submitted_at)
+        csv_row['Confirmation_Status'] = confirmation['status']
+        csv_row['Confirmation_Slot'] = confirmation['slot']
+        if confirmation['latency'] is not None:
+            csv_row['Confirmation_Latency_Seconds'] = round(confirmation['latency'], 3)
+
+    if job['kind'] != 'pack':
+        log_row(f"Execution trace {job['index']} results computed!")
+        return [csv_row]
+
+    # Packed rows share the transaction results, but are still reported one by one
+    packed_trace_ids = ' '.join(packed_job['trace_id'] for packed_job in job['jobs'])
+    rows = []
+    for packed_job in job['jobs']:
+        rows.append(dict(csv_row, Trace_ID=packed_job['trace_id'], Packed_Trace_IDs=packed_trace_ids))
+        log_row(f"Execution trace {packed_job['index']} results computed!")
+    return rows
+
+def _get_instruction(job):
+    # Packed rows have their instruction built already
+    if 'ix' not in job:
+        job['ix'] = build_instruction(job['program_name'], job['instruction'], job['accounts'], job['args'])
+    return job['ix']
+
 def _find_execution_traces():
     path = f"{anchor_base_path}/execution_traces/"
     if not os.path.exists(path):
@@ -236,36 +434,37 @@ def _find_execution_traces():
 
     return [f for f in os.listdir(path) if f.lower().endswith('.csv')]
 
-def _read_csv(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, mode='r') as file:
-            csv_file = csv.reader(file)
-            return list(csv_file)
-    else:
-        return None
-
-def _write_csv(file_name, results):
-    folder = f'{anchor_base_path}/execution_traces_results/'
-    csv_file = os.path.join(folder, f'{file_name}_results.csv')
-
-    # Create folder if it doesn't exist
-    os.makedirs(folder, exist_ok=True)
-
-    # Write CSV file with headers
-    with open(csv_file, mode='w', newline='') as file:
-        csv_writer = csv.writer(file)
-        
-        # Write header row with field descriptions
-        header = [
-            'Trace_ID',
-            'Transaction_Size_Bytes', 
-            'Transaction_Fees_Lamports',
-            'Transaction_Hash_or_Status'
-        ]
-        csv_writer.writerow(header)
-        
-        # Write results
-        for row in results:
-            csv_writer.writerow(row)
-    
-    return csv_file
\ No newline at end of file
+def _on_job_completed(results_file, job, rows):
+    with measure_stage('write_results'):
+        append_results(results_file, job, rows)
+    if job['kind'] != 'slot':
+        row_completed(len(rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Execute an execution trace and write the results of each row.")
+    parser.add_argument('--resume', action='store_true', help="Continue after the last row completed by a previous run")
+    parser.add_argument('--concurrency', type=int, default=1, help="Rows executed at the same time")
+    parser.add_argument('--offline', action='store_true', help="Measure size and fees without any cluster connection")
+    parser.add_argument('--offline-fees', action='store_true', help="Compute fees with the local fee model")
+    parser.add_argument('--fee-verify-fraction', type=float, default=0.0,
+                        help="Fraction of offline fees checked against the RPC")
+    parser.add_argument('--websocket-endpoint', help="Endpoint used to subscribe to slot updates")
+    parser.add_argument('--pack', action='store_true', help="Pack consecutive rows in a single transaction")
+    parser.add_argument('--auto-lookup-table', action='store_true',
+                        help="Measure the size saved by a table of the most used keys")
+    parser.add_argument('--rpc-endpoint', help="Send all the RPC requests to this endpoint")
+    parser.add_argument('--live-summary', action='store_true', help="Show stage timings instead of a line per row")
+    parser.add_argument('--simulate', action='store_true', help="Measure compute units before sending")
+    parser.add_argument('--simulation-concurrency', type=int, default=8, help="Simulations running at the same time")
+    parser.add_argument('--simulation-cache', action='store_true', help="Reuse compute units of previous runs")
+    parser.add_argument('--blockhash-ttl', type=float, default=20, help="Seconds a fetched blockhash is reused for")
+    parser.add_argument('--blockhash-commitment', choices=['processed', 'confirmed', 'finalized'],
+                        help="Commitment of the fetched blockhash")
+    options = parser.parse_args()
+
+    asyncio.run(run_execution_trace(options.concurrency, options.offline_fees, options.fee_verify_fraction,
+                                    options.offline, options.websocket_endpoint, options.resume, options.pack,
+                                    options.auto_lookup_table, options.rpc_endpoint, options.live_summary,
+                                    options.simulate, options.simulation_concurrency, options.simulation_cache,
+                                    options.blockhash_ttl, options.blockhash_commitment))
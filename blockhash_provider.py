@@ -0,0 +1,102 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import asyncio
+import time
+from solana_module.anchor_module.run_metrics import measure_stage, log_message
+
+
+# A blockhash stays valid for about 150 slots (roughly one minute), so serving it for a
+# fraction of that time leaves enough margin to sign and send the transaction
+_settings = {
+    'ttl': 20,  # Seconds a fetched blockhash is served for
+    'commitment': None  # Commitment used to fetch the blockhash, None uses the client default
+}
+
+_blockhashes = dict()  # Client -> (blockhash, fetch time)
+_pending_fetches = dict()  # Client -> task fetching a new blockhash
+_refresh_tasks = dict()  # Client -> background refresh task
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def configure_blockhash_provider(ttl=20, commitment=None):
+    # Every run sets both, so that the settings of a previous run are not kept
+    _settings['ttl'] = ttl
+    _settings['commitment'] = commitment
+    _blockhashes.clear()
+
+async def get_recent_blockhash(client):
+    # Serve the cached blockhash while it is fresh
+    cached = _blockhashes.get(client)
+    if cached is not None and time.monotonic() - cached[1] < _settings['ttl']:
+        return cached[0]
+
+    return await _request_blockhash(client)
+
+def start_blockhash_refresh(client):
+    # Keep the cached blockhash fresh in the background, so builds never wait for it
+    task = _refresh_tasks.get(client)
+    if task is None or task.done():
+        _refresh_tasks[client] = asyncio.ensure_future(_refresh_blockhash(client))
+
+async def stop_blockhash_refresh():
+    for task in _refresh_tasks.values():
+        task.cancel()
+    await asyncio.gather(*_refresh_tasks.values(), return_exceptions=True)
+    _refresh_tasks.clear()
+    _blockhashes.clear()
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _request_blockhash(client):
+    # Concurrent callers share the same RPC request
+    fetch = _pending_fetches.get(client)
+    if fetch is None:
+        fetch = asyncio.ensure_future(_fetch_blockhash(client))
+        _pending_fetches[client] = fetch
+    return await fetch
+
+async def _fetch_blockhash(client):
+    try:
+        with measure_stage('blockhash_rpc'):
+            resp = await client.get_latest_blockhash(_settings['commitment'])
+        blockhash = resp.value.blockhash
+        _blockhashes[client] = (blockhash, time.monotonic())
+        return blockhash
+    finally:
+        _pending_fetches.pop(client, None)
+
+async def _refresh_blockhash(client):
+    while True:
+        try:
+            await _request_blockhash(client)
+        except Exception as e:
+            log_message(f"Error refreshing blockhash: {e}")
+        await asyncio.sleep(_settings['ttl'] / 2)
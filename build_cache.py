@@ -0,0 +1,164 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import shutil
+from solana_module.solana_utils import run_command
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+
+
+_BUILD_CACHE_VERSION = 2
+
+# Files produced by init, build, IDL conversion and client generation, relative to the program folder
+_CACHED_PATHS = [
+    'anchor_environment/Anchor.toml',
+    'anchor_environment/Cargo.toml',
+    'anchor_environment/programs/anchor_environment/Cargo.toml',
+    'anchor_environment/programs/anchor_environment/src/lib.rs',
+    'anchor_environment/target/deploy',
+    'anchor_environment/target/idl',
+    'anchorpy_files'
+]
+
+# Commands whose output identifies the toolchain
+_TOOLCHAIN_COMMANDS = ['anchor --version', 'cargo --version', 'rustc --version', 'solana --version']
+
+# Python packages generating cached files: anchorpy client-gen writes anchorpy_files
+_TOOLCHAIN_PACKAGES = ['anchorpy']
+
+_toolchain_versions = dict()  # Operating system -> versions, read once per process
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def build_cache_key(program_name, program, cargo_configuration, operating_system):
+    # Same program, same source, same generated Cargo.toml and same toolchain give the same build. The name is
+    # part of the key because the entry holds the program keypair and an IDL named after the program
+    content = {
+        'version': _BUILD_CACHE_VERSION,
+        'program_name': program_name,
+        'program': program,
+        'cargo_configuration': cargo_configuration,
+        'toolchain': _read_toolchain_versions(operating_system)
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+def restore_build(program_name, key):
+    # Copy the cached files into the program folder, returning the program ID, or None on a miss
+    entry_path = _entry_path(key)
+    metadata_path = os.path.join(entry_path, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path, 'r') as file:
+        metadata = json.load(file)
+
+    # Cluster and wallet are written by the deploy, after the entry was saved, so they are kept
+    program_path = f"{anchor_base_path}/.anchor_files/{program_name}"
+    deploy_settings = _read_deploy_settings(program_path)
+    for relative_path in _CACHED_PATHS:
+        _copy(os.path.join(entry_path, 'files', relative_path), os.path.join(program_path, relative_path))
+    if deploy_settings is not None:
+        _write_deploy_settings(program_path, deploy_settings)
+    return metadata['program_id']
+
+def save_build(program_name, key, program_id):
+    program_path = f"{anchor_base_path}/.anchor_files/{program_name}"
+    for relative_path in _CACHED_PATHS:
+        if not os.path.exists(os.path.join(program_path, relative_path)):
+            print(f"Build not cached, {relative_path} is missing.")
+            return False
+
+    # The entry is filled in a temporary folder, so that a partial entry is never restored
+    entry_path = _entry_path(key)
+    temporary_entry_path = f"{entry_path}.{os.getpid()}.tmp"
+    shutil.rmtree(temporary_entry_path, ignore_errors=True)
+    for relative_path in _CACHED_PATHS:
+        _copy(os.path.join(program_path, relative_path), os.path.join(temporary_entry_path, 'files', relative_path))
+    with open(os.path.join(temporary_entry_path, 'metadata.json'), 'w') as file:
+        json.dump({'program_name': program_name, 'program_id': program_id}, file)
+
+    shutil.rmtree(entry_path, ignore_errors=True)
+    os.replace(temporary_entry_path, entry_path)
+    return True
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _entry_path(key):
+    return f"{anchor_base_path}/.build_cache/{key}"
+
+def _read_toolchain_versions(operating_system):
+    versions = _toolchain_versions.get(operating_system)
+    if versions is None:
+        versions = dict()
+        for command in _TOOLCHAIN_COMMANDS:
+            result = run_command(operating_system, command)
+            versions[command] = result.stdout.strip() if result is not None else None
+        for package in _TOOLCHAIN_PACKAGES:
+            versions[package] = _package_version(package)
+        _toolchain_versions[operating_system] = versions
+    return versions
+
+def _package_version(package):
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def _read_deploy_settings(program_path):
+    anchor_toml_path = os.path.join(program_path, 'anchor_environment', 'Anchor.toml')
+    if not os.path.exists(anchor_toml_path):
+        return None
+
+    import toml
+    provider = toml.load(anchor_toml_path).get('provider', dict())
+    return {key: provider[key] for key in ['cluster', 'wallet'] if key in provider}
+
+def _write_deploy_settings(program_path, deploy_settings):
+    import toml
+
+    anchor_toml_path = os.path.join(program_path, 'anchor_environment', 'Anchor.toml')
+    config = toml.load(anchor_toml_path)
+    config.setdefault('provider', dict()).update(deploy_settings)
+    with open(anchor_toml_path, 'w') as file:
+        toml.dump(config, file)
+
+def _copy(source, destination):
+    # The destination is replaced, not merged, so that stale files (e.g. removed client modules) do not survive
+    if os.path.isdir(destination):
+        shutil.rmtree(destination)
+    elif os.path.exists(destination):
+        os.remove(destination)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    if os.path.isdir(source):
+        shutil.copytree(source, destination, dirs_exist_ok=True)
+    else:
+        shutil.copy2(source, destination)
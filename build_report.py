@@ -0,0 +1,124 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+
+
+_reports = dict()  # Program -> report of the build in progress
+_started_at = dict()  # Program -> monotonic time at which the build started
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def start_build_report(program_name, program, options):
+    # The source hash tells apart builds of different versions of the same program
+    _reports[program_name] = {
+        'program': program_name,
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'source_hash': hashlib.sha256(program.encode()).hexdigest(),
+        'options': dict(options),
+        'phases': dict(),
+        'success': None
+    }
+    # Wall-clock time of the whole build, including the time spent outside the measured phases
+    _started_at[program_name] = time.monotonic()
+
+@contextmanager
+def measure_build_phase(program_name, phase):
+    # Phases run more than once (e.g. a build retried) are summed
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        report = _reports.get(program_name)
+        if report is not None:
+            report['phases'][phase] = report['phases'].get(phase, 0.0) + time.monotonic() - start
+
+def add_build_report_details(program_name, **details):
+    report = _reports.get(program_name)
+    if report is not None:
+        report.update(details)
+
+def stop_build_clock(program_name):
+    # Time spent afterwards (e.g. waiting for the user to choose whether to deploy) is not part of the build.
+    # Phases measured later, like deploy, are still recorded
+    report = _reports.get(program_name)
+    started_at = _started_at.pop(program_name, None)
+    if report is not None and started_at is not None:
+        report['total_seconds'] = time.monotonic() - started_at
+
+def finish_build_report(program_name, success):
+    stop_build_clock(program_name)
+    report = _reports.pop(program_name, None)
+    if report is None:
+        return None
+    report['success'] = success
+
+    # Latest report next to the program, and the history of all the builds to compare runs
+    previous = _find_previous_report(program_name)
+    report_path = f"{anchor_base_path}/.anchor_files/{program_name}/build_report.json"
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, 'w') as file:
+        json.dump(report, file, indent=2)
+    with open(_history_path(), 'a') as file:
+        file.write(json.dumps(report) + "\n")
+
+    _print_build_report(report, previous)
+    return report
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _history_path():
+    return f"{anchor_base_path}/.anchor_files/build_reports.jsonl"
+
+def _find_previous_report(program_name):
+    # Last successful build of the program
+    previous = None
+    if os.path.exists(_history_path()):
+        with open(_history_path(), 'r') as file:
+            for line in file:
+                report = json.loads(line)
+                if report['program'] == program_name and report['success']:
+                    previous = report
+    return previous
+
+def _print_build_report(report, previous):
+    print(f"Build phases of {report['program']} ({report['total_seconds']:.1f}s):")
+    for phase, seconds in report['phases'].items():
+        line = f"  {phase:<20} {seconds:>8.1f}s"
+        previous_seconds = previous['phases'].get(phase) if previous is not None else None
+        if previous_seconds:
+            line += f"  ({(seconds - previous_seconds) / previous_seconds * 100:+.0f}% from {previous_seconds:.1f}s)"
+        print(line)
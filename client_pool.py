@@ -0,0 +1,71 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+from solana_module.solana_utils import create_client
+
+
+# Open clients, keyed by cluster name or endpoint
+_clients = dict()
+
+# Endpoint used instead of the cluster ones, e.g. a local RPC stand-in
+_settings = {
+    'endpoint_override': None
+}
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def set_endpoint_override(endpoint):
+    # Every cluster is served by the given endpoint, None restores the cluster endpoints
+    _settings['endpoint_override'] = endpoint
+
+def get_client(cluster):
+    if _settings['endpoint_override'] is not None:
+        return get_endpoint_client(_settings['endpoint_override'])
+
+    # The same client (and its keep-alive HTTP connections) is shared by every caller
+    client = _clients.get(cluster)
+    if client is None:
+        client = create_client(cluster)
+        _clients[cluster] = client
+    return client
+
+def get_endpoint_client(endpoint):
+    client = _clients.get(endpoint)
+    if client is None:
+        from solana.rpc.async_api import AsyncClient
+        client = AsyncClient(endpoint)
+        _clients[endpoint] = client
+    return client
+
+async def close_clients():
+    # Close every open client, to be called once at the end of a run
+    for client in _clients.values():
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"Error closing client: {e}")
+    _clients.clear()
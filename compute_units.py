@@ -0,0 +1,134 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import asyncio
+import hashlib
+import json
+import glob
+import os
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+from solana_module.anchor_module.run_metrics import measure_stage
+
+
+_settings = {
+    'max_concurrency': 8  # Simulations running at the same time, independently of the rows being executed
+}
+
+_state = {'semaphore': None, 'cache_path': None}
+_cache = dict()  # Cache key -> {'units', 'error'}
+_artifact_hashes = dict()  # Program -> (modification times, hash of its binary and IDL)
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def configure_simulation(max_concurrency=None):
+    if max_concurrency is not None:
+        _settings['max_concurrency'] = max_concurrency
+    _state['semaphore'] = None
+
+def load_simulation_cache(file_path):
+    # Results of previous runs, so that rows already simulated are skipped
+    _state['cache_path'] = file_path
+    _cache.clear()
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as file:
+            _cache.update(json.load(file))
+
+def save_simulation_cache():
+    if _state['cache_path'] is None:
+        return
+    temporary_file_path = f"{_state['cache_path']}.tmp"
+    with open(temporary_file_path, 'w') as file:
+        json.dump(_cache, file)
+    os.replace(temporary_file_path, _state['cache_path'])
+    _state['cache_path'] = None
+
+def simulation_cache_key(jobs):
+    # Rows with the same program build, instructions, accounts, args and payer consume the same compute units
+    content = [[job['program_name'], _hash_program_artifacts(job['program_name']), job['instruction'],
+                sorted((name, str(key)) for name, key in job['accounts'].items()),
+                job['args'], str(job['provider_keypair'].pubkey())] for job in jobs]
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+async def simulate_compute_units(client, tx, cache_key=None):
+    if cache_key is not None and cache_key in _cache:
+        return _cache[cache_key]
+
+    # The semaphore is created lazily, so that it belongs to the running event loop
+    if _state['semaphore'] is None:
+        _state['semaphore'] = asyncio.Semaphore(_settings['max_concurrency'])
+
+    async with _state['semaphore']:
+        with measure_stage('simulation'):
+            try:
+                response = await client.simulate_transaction(tx, sig_verify=False)
+            except Exception as e:
+                # RPC failures are not cached, the row will be simulated again next time
+                return {'units': None, 'error': f"Simulation request failed: {e}"}
+
+    result = {
+        'units': response.value.units_consumed,
+        'error': _extract_error(response.value.err, response.value.logs)
+    }
+    # Failures depend on the chain state (e.g. an account not initialized yet), so only successes are cached
+    if cache_key is not None and result['error'] is None:
+        _cache[cache_key] = result
+    return result
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _hash_program_artifacts(program_name):
+    # A redeployed program may consume different compute units, so the binary and the IDL are part of the key
+    environment_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target"
+    paths = sorted(glob.glob(f"{environment_path}/deploy/*.so")) + [f"{environment_path}/idl/{program_name}.json"]
+    mtimes = [os.path.getmtime(path) if os.path.exists(path) else None for path in paths]
+
+    cached = _artifact_hashes.get(program_name)
+    if cached is not None and cached[0] == (paths, mtimes):
+        return cached[1]
+
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+    _artifact_hashes[program_name] = ((paths, mtimes), digest.hexdigest())
+    return digest.hexdigest()
+
+def _extract_error(err, logs):
+    if err is None:
+        return None
+
+    # Program logs explain the error better than the error code, e.g. Anchor error messages
+    for line in reversed(logs or []):
+        if 'Error Message:' in line:
+            return line.split('Error Message:', 1)[1].strip()
+        if ' failed: ' in line:
+            return line.split(' failed: ', 1)[1].strip()
+    return str(err)
@@ -0,0 +1,109 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import asyncio
+import time
+from solana_module.anchor_module.run_metrics import log_message
+
+
+_MAX_SIGNATURES_PER_REQUEST = 256  # Limit of getSignatureStatuses
+_POLL_INTERVAL = 0.5  # Seconds between two polling rounds
+_CONFIRMATION_TIMEOUT = 90  # Seconds after which a transaction is considered not landed
+
+_outstanding = dict()  # Client -> signature -> (future, submission time)
+_pollers = dict()  # Client -> polling task
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def confirm_signature(client, signature, submitted_at):
+    # Register the signature, it will be polled together with all the other outstanding ones
+    future = asyncio.get_running_loop().create_future()
+    _outstanding.setdefault(client, dict())[signature] = (future, submitted_at)
+
+    poller = _pollers.get(client)
+    if poller is None or poller.done():
+        _pollers[client] = asyncio.ensure_future(_poll_statuses(client))
+
+    return await future
+
+async def stop_confirmation_tracking():
+    for poller in _pollers.values():
+        poller.cancel()
+    await asyncio.gather(*_pollers.values(), return_exceptions=True)
+    _pollers.clear()
+
+    for outstanding in _outstanding.values():
+        for future, _ in outstanding.values():
+            future.cancel()
+    _outstanding.clear()
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _poll_statuses(client):
+    from solders.transaction_status import TransactionConfirmationStatus
+
+    # Confirmation levels at which a transaction is considered landed
+    landed_statuses = {
+        TransactionConfirmationStatus.Confirmed: 'confirmed',
+        TransactionConfirmationStatus.Finalized: 'finalized'
+    }
+    outstanding = _outstanding[client]
+
+    while outstanding:
+        await asyncio.sleep(_POLL_INTERVAL)
+
+        # Poll outstanding signatures in batches
+        signatures = list(outstanding)
+        for start in range(0, len(signatures), _MAX_SIGNATURES_PER_REQUEST):
+            batch = signatures[start:start + _MAX_SIGNATURES_PER_REQUEST]
+            try:
+                response = await client.get_signature_statuses(batch)
+                statuses = response.value
+            except Exception as e:
+                # Pending signatures still expire while the RPC keeps failing
+                log_message(f"Error checking signature statuses: {e}")
+                statuses = [None] * len(batch)
+
+            now = time.monotonic()
+            for signature, status in zip(batch, statuses):
+                future, submitted_at = outstanding[signature]
+                if status is not None and status.err is not None:
+                    confirmation = {'status': 'failed', 'slot': status.slot, 'latency': now - submitted_at}
+                elif status is not None and status.confirmation_status in landed_statuses:
+                    confirmation = {'status': landed_statuses[status.confirmation_status], 'slot': status.slot,
+                                    'latency': now - submitted_at}
+                elif now - submitted_at > _CONFIRMATION_TIMEOUT:
+                    confirmation = {'status': 'timeout', 'slot': None, 'latency': None}
+                else:
+                    continue
+
+                del outstanding[signature]
+                if not future.done():
+                    future.set_result(confirmation)
@@ -0,0 +1,108 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import math
+from solana_module.anchor_module.run_metrics import log_message
+
+
+# Base fee charged for each signature required by a message, per cluster
+LAMPORTS_PER_SIGNATURE = {
+    'Localnet': 5000,
+    'Devnet': 5000,
+    'Mainnet': 5000
+}
+DEFAULT_LAMPORTS_PER_SIGNATURE = 5000
+
+# Compute budget rules applied by the runtime when no limit is requested
+_DEFAULT_INSTRUCTION_COMPUTE_UNIT_LIMIT = 200_000
+_MAX_COMPUTE_UNIT_LIMIT = 1_400_000
+_MICRO_LAMPORTS_PER_LAMPORT = 1_000_000
+
+# ComputeBudget program, compared as a string so that solders is not needed to read messages
+_COMPUTE_BUDGET_PROGRAM_ID = 'ComputeBudget111111111111111111111111111111'
+
+# ComputeBudget instruction discriminators
+_SET_COMPUTE_UNIT_LIMIT = 2
+_SET_COMPUTE_UNIT_PRICE = 3
+
+# Outcome of the comparisons between estimated and RPC fees
+_verification = {'checked': 0, 'mismatches': []}
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def lamports_per_signature(cluster):
+    return LAMPORTS_PER_SIGNATURE.get(cluster, DEFAULT_LAMPORTS_PER_SIGNATURE)
+
+def estimate_transaction_fee(message, signature_lamports=DEFAULT_LAMPORTS_PER_SIGNATURE):
+    # Base fee: one charge per required signature
+    base_fee = message.header.num_required_signatures * signature_lamports
+
+    # Priority fee: compute unit price (in micro-lamports) times the requested compute unit limit
+    compute_unit_limit, compute_unit_price = _read_compute_budget(message)
+    priority_fee = math.ceil(compute_unit_price * compute_unit_limit / _MICRO_LAMPORTS_PER_LAMPORT)
+
+    return base_fee + priority_fee
+
+async def verify_transaction_fee(client, message, estimated_fee, trace_id):
+    # Compare the estimated fee with the one computed by the cluster
+    response = await client.get_fee_for_message(message)
+    _verification['checked'] += 1
+    if response.value != estimated_fee:
+        _verification['mismatches'].append((trace_id, estimated_fee, response.value))
+        log_message(f"Fee mismatch for execution trace {trace_id}: estimated {estimated_fee}, cluster {response.value}")
+
+def fee_verification_summary():
+    return _verification['checked'], list(_verification['mismatches'])
+
+def reset_fee_verification():
+    _verification['checked'] = 0
+    _verification['mismatches'] = []
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _read_compute_budget(message):
+    compute_unit_limit = None
+    compute_unit_price = 0
+    other_instructions = 0
+
+    for instruction in message.instructions:
+        program_id = message.account_keys[instruction.program_id_index]
+        data = bytes(instruction.data)
+        if str(program_id) != _COMPUTE_BUDGET_PROGRAM_ID:
+            other_instructions += 1
+        elif data[:1] == bytes([_SET_COMPUTE_UNIT_LIMIT]):
+            compute_unit_limit = int.from_bytes(data[1:5], 'little')
+        elif data[:1] == bytes([_SET_COMPUTE_UNIT_PRICE]):
+            compute_unit_price = int.from_bytes(data[1:9], 'little')
+
+    # Without an explicit limit, each instruction gets the default budget
+    if compute_unit_limit is None:
+        compute_unit_limit = other_instructions * _DEFAULT_INSTRUCTION_COMPUTE_UNIT_LIMIT
+    return min(compute_unit_limit, _MAX_COMPUTE_UNIT_LIMIT), compute_unit_price
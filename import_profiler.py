@@ -0,0 +1,102 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import re
+import subprocess
+import sys
+
+
+# Maximum time, in seconds, that importing each entry point may take in a fresh interpreter
+IMPORT_TIME_BUDGETS = {
+    'solana_module.anchor_module.anchor_utils': 0.15,
+    'solana_module.anchor_module.program_compiler_and_deployer': 0.2,
+    'solana_module.anchor_module.automatic_data_insertion_manager': 0.5
+}
+
+# Line printed by -X importtime: self time | cumulative time | indented module name
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|( *)(\S+)")
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def measure_import_time(module_name):
+    # Import the module in a fresh interpreter, so that nothing is already cached
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        # The error is the last line that is not an import time measurement, if there is any
+        error_lines = [line for line in result.stderr.strip().splitlines() if not line.startswith("import time:")]
+        error = error_lines[-1] if error_lines else f"interpreter exited with code {result.returncode}"
+        print(f"Error importing {module_name}: {error}")
+        return None
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            entries.append({
+                'module': match.group(4),
+                'self': int(match.group(1)) / 1_000_000,
+                'cumulative': int(match.group(2)) / 1_000_000,
+                'depth': (len(match.group(3)) - 1) // 2
+            })
+    return entries
+
+def print_startup_report(module_name, entries, top=10):
+    # The last top-level entry is the requested import, the other ones belong to interpreter startup
+    top_level = [entry for entry in entries if entry['depth'] == 0]
+    module_time = top_level[-1]['cumulative']
+    interpreter_time = sum(entry['cumulative'] for entry in top_level[:-1])
+
+    print(f"{module_name}: {module_time * 1000:.1f} ms (interpreter startup {interpreter_time * 1000:.1f} ms)")
+    print(f"  {'self [ms]':>10} | {'cumulative [ms]':>15} | module")
+    for entry in sorted(entries, key=lambda e: e['self'], reverse=True)[:top]:
+        print(f"  {entry['self'] * 1000:>10.1f} | {entry['cumulative'] * 1000:>15.1f} | {entry['module']}")
+
+    return module_time
+
+def check_import_budgets(budgets=None, top=10):
+    if budgets is None:
+        budgets = IMPORT_TIME_BUDGETS
+
+    within_budget = True
+    for module_name, budget in budgets.items():
+        entries = measure_import_time(module_name)
+        if not entries:
+            within_budget = False
+            continue
+
+        module_time = print_startup_report(module_name, entries, top)
+        if module_time > budget:
+            print(f"  Over budget: {module_time * 1000:.1f} ms > {budget * 1000:.0f} ms")
+            within_budget = False
+
+    return within_budget
+
+
+if __name__ == "__main__":
+    # Exit with an error when an entry point exceeds its budget, so that it can be used in CI
+    sys.exit(0 if check_import_budgets() else 1)
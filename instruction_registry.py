@@ -0,0 +1,96 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import re
+import sys
+import importlib
+import importlib.machinery
+import importlib.util
+from pathlib import Path
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+
+
+_builders = dict()  # (program name, instruction name) -> instruction builder
+_packages = dict()  # Program name -> name of its isolated anchorpy package
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def get_instruction_builder(program_name, instruction_name):
+    # Instruction modules are imported only the first time they are needed
+    builder = _builders.get((program_name, instruction_name))
+    if builder is None:
+        builder = _load_builder(program_name, instruction_name)
+        _builders[(program_name, instruction_name)] = builder
+    return builder
+
+def preload_instruction_builders(program_name):
+    # Import every instruction of the program upfront
+    instructions_path = _program_root(program_name) / "anchorpy_files" / "instructions"
+    for module_path in sorted(instructions_path.glob("*.py")):
+        if module_path.stem != "__init__":
+            get_instruction_builder(program_name, module_path.stem)
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _program_root(program_name):
+    program_root = Path(f"{anchor_base_path}/.anchor_files/{program_name}").resolve()
+    if not program_root.exists():
+        raise FileNotFoundError(f"The folder {program_root} does not exist. Check program name")
+    return program_root
+
+def _load_builder(program_name, instruction_name):
+    package_name = _get_package(program_name)
+
+    # Path to the instruction
+    module_path = _program_root(program_name) / "anchorpy_files" / "instructions" / f"{instruction_name}.py"
+    if not module_path.exists():
+        raise FileNotFoundError(f"The file {module_path} does not exist. Verify instruction name.")
+
+    # Import the module inside the isolated package of the program
+    module_name = f"{package_name}.instructions.{instruction_name}"
+    module = importlib.import_module(module_name)
+
+    # Verify that the function exists
+    if not hasattr(module, instruction_name):
+        raise AttributeError(f"The module {module_name} does not contain the function {instruction_name}.")
+
+    return getattr(module, instruction_name)
+
+def _get_package(program_name):
+    # Each program's anchorpy_files folder is registered under its own package name, so that programs
+    # with instructions of the same name do not collide in sys.modules and sys.path is left untouched
+    package_name = _packages.get(program_name)
+    if package_name is None:
+        package_name = f"anchorpy_files_{re.sub(r'[^0-9a-zA-Z_]', '_', program_name)}"
+        spec = importlib.machinery.ModuleSpec(package_name, None, is_package=True)
+        spec.submodule_search_locations = [str(_program_root(program_name) / "anchorpy_files")]
+        sys.modules[package_name] = importlib.util.module_from_spec(spec)
+        _packages[program_name] = package_name
+    return package_name
@@ -0,0 +1,85 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import hashlib
+from solana_module.anchor_module.run_metrics import log_message
+
+
+_MAX_ADDRESSES = 256  # Addresses a lookup table can hold
+_MIN_KEY_USES = 2  # Rows that must use a key before it is added to the automatic lookup table
+
+# Address of the automatic lookup table. The table only exists locally, to measure the size it would save
+_AUTOMATIC_LOOKUP_TABLE_ADDRESS = hashlib.sha256(b"automatic_lookup_table").digest()
+
+_lookup_tables = dict()  # Address -> lookup table fetched from the cluster
+_key_uses = dict()  # Account key -> number of rows using it
+_automatic_lookup_table = {'addresses': [], 'account': None}
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def get_lookup_table(client, address):
+    from solders.address_lookup_table_account import AddressLookupTable, AddressLookupTableAccount
+
+    # Lookup tables are fetched once and reused by every transaction referencing them
+    lookup_table = _lookup_tables.get(address)
+    if lookup_table is None:
+        response = await client.get_account_info(address)
+        if response.value is None:
+            log_message(f"Lookup table {address} not found.")
+            return None
+        table = AddressLookupTable.deserialize(bytes(response.value.data))
+        lookup_table = AddressLookupTableAccount(key=address, addresses=list(table.addresses))
+        _lookup_tables[address] = lookup_table
+    return lookup_table
+
+def record_key_usage(keys):
+    # Keys used by enough rows are added to the automatic lookup table
+    addresses = _automatic_lookup_table['addresses']
+    for key in set(keys):
+        uses = _key_uses.get(key, 0) + 1
+        _key_uses[key] = uses
+        if uses == _MIN_KEY_USES and len(addresses) < _MAX_ADDRESSES:
+            addresses.append(key)
+            _automatic_lookup_table['account'] = None
+
+def automatic_lookup_table():
+    # The table object is rebuilt only when new addresses have been added
+    addresses = _automatic_lookup_table['addresses']
+    if not addresses:
+        return None
+    if _automatic_lookup_table['account'] is None:
+        from solders.pubkey import Pubkey
+        from solders.address_lookup_table_account import AddressLookupTableAccount
+        _automatic_lookup_table['account'] = AddressLookupTableAccount(
+            key=Pubkey.from_bytes(_AUTOMATIC_LOOKUP_TABLE_ADDRESS), addresses=list(addresses))
+    return _automatic_lookup_table['account']
+
+def reset_lookup_tables():
+    _lookup_tables.clear()
+    _key_uses.clear()
+    _automatic_lookup_table['addresses'] = []
+    _automatic_lookup_table['account'] = None
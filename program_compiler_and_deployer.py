@@ -21,20 +21,43 @@
 # THE SOFTWARE.
 
 
+import contextlib
+import io
+import multiprocessing
 import json
-import toml
 import re
 import os
 import platform
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from solana_module.solana_utils import choose_wallet, run_command, choose_cluster
 from solana_module.anchor_module.anchor_utils import anchor_base_path, load_idl
-
+from solana_module.anchor_module.build_cache import build_cache_key, restore_build, save_build
+from solana_module.anchor_module.build_report import start_build_report, measure_build_phase, \
+    add_build_report_details, stop_build_clock, finish_build_report
+from solana_module.anchor_module.vendored_registry import create_resolver_crate, vendor_dependencies, \
+    is_registry_vendored, configure_offline_build, vendored_lockfile_hash
+from solana_module.anchor_module.shared_workspace import set_worker_slot, prepare_workspace_template, \
+    prepare_shared_targets, clone_workspace_template, use_shared_target, collect_shared_artifacts
+
+
+# Versions of the crates addInitIfNeeded adds to a program Cargo.toml
+_PINNED_VERSIONS = {
+    'anchor-lang': "0.31.1",
+    'anchor-spl': "0.31.1",
+    'spl-token': "7.0",
+    'spl-associated-token-account': "4.0",
+    'pyth-sdk-solana': "0.10",
+    'switchboard-solana': "0.29",
+    'mpl-token-metadata': "4.1"
+}
 
 # ====================================================
 # PUBLIC FUNCTIONS
 # ====================================================
 
-def compile_programs():
+def compile_programs(batch=False, max_workers=None, use_cache=True, shared_target=False, vendored=False,
+                     cargo_timings=False):
     program_id = None
     programs_path = f"{anchor_base_path}/anchor_programs" # Path where anchor programs are placed
 
@@ -47,24 +70,32 @@ def compile_programs():
         print('No programs to compile in anchor_programs folder.')
         return
 
+    options = {
+        'use_cache': use_cache,  # Restore unchanged programs from the build cache
+        'shared_target': shared_target,  # Clone a workspace template and reuse compiled dependencies
+        'vendored': vendored,  # Build offline, with the crates vendored once for all programs
+        'cargo_timings': cargo_timings  # Let cargo write its per-crate timing report
+    }
+    if vendored and not _prepare_vendored_registry(operating_system):
+        return
+
+    # Batch mode builds every program concurrently, without asking to deploy
+    if batch:
+        return _compile_programs_batch(file_names, programs, operating_system, max_workers, options)
+
     # For each program
     for file_name,program in zip(file_names, programs):
         print(f"Compiling program: {file_name}")
         file_name_without_extension = file_name.removesuffix(".rs") # Get filename without .rs extension
 
-        # Compiling phase
-        done, program_id = _compile_program(file_name_without_extension, operating_system, program) # Compile program
+        # Compiling and anchorpy initialization phases, skipped if the same build is cached
+        start_build_report(file_name_without_extension, program, options)
+        done, program_id = _build_program_phases(file_name_without_extension, operating_system, program, options)
+        stop_build_clock(file_name_without_extension)
         if not done:
+            finish_build_report(file_name_without_extension, False)
             return
 
-        result =_convert_idl_for_anchorpy(file_name_without_extension)
-        if result is None:
-            return
-
-        # Anchorpy initialization phase
-        if program_id: # If deploy succeed, initialize anchorpy
-            _initialize_anchorpy(file_name_without_extension, program_id, operating_system)
-
         # Deploying phase
         allowed_choice = ['y', 'n', 'Y', 'N']
         choice = None
@@ -74,9 +105,10 @@ def compile_programs():
             if choice == "y" or choice == "Y":
                 _deploy_program(file_name_without_extension, operating_system)
             elif choice == "n" or choice == "N":
-                return
+                break
             else:
                 print('Please insert a valid choice.')
+        finish_build_report(file_name_without_extension, True)
 
 
 
@@ -90,6 +122,148 @@ def compile_programs():
 # Compiling phase functions
 # ====================================================
 
+# Output of the last build command of each program, kept for the batch build logs
+_build_outputs = dict()
+
+# Source matching every indicator checked by _detect_dependencies_from_code and _check_for_anchor_spl_usage
+_CODE_USING_ALL_DEPENDENCIES = ("use anchor_spl::token::{Token, TokenAccount};\n"
+                                "use pyth_sdk_solana;\n"
+                                "use switchboard_solana;\n"
+                                "use spl_token;\n"
+                                "use spl_associated_token_account;\n"
+                                "use mpl_token_metadata;\n")
+
+def _prepare_vendored_registry(operating_system):
+    # Vendored once: delete .anchor_files/.vendor to resolve the dependencies again
+    if is_registry_vendored():
+        return True
+
+    # The resolver gets every dependency and feature addInitIfNeeded can add, for any program
+    cargo_toml_path = create_resolver_crate()
+    if not addInitIfNeeded(cargo_toml_path, _CODE_USING_ALL_DEPENDENCIES):
+        return False
+    return vendor_dependencies(operating_system)
+
+def _build_program_phases(program_name, operating_system, program, options):
+    # The generated Cargo.toml only depends on what the source uses, on the pinned versions and on the toolchain
+    key = None
+    if options['use_cache']:
+        cargo_configuration = [_check_for_anchor_spl_usage(program), _detect_dependencies_from_code(program),
+                               _PINNED_VERSIONS]
+        if options['vendored']:
+            cargo_configuration.append(vendored_lockfile_hash())
+        key = build_cache_key(program_name, program, cargo_configuration, operating_system)
+        with measure_build_phase(program_name, 'cache_restore'):
+            program_id = restore_build(program_name, key)
+        if program_id is not None:
+            print(f"Program {program_name} unchanged, restored from the build cache.")
+            return True, program_id
+
+    # Compiling phase
+    done, program_id = _compile_program(program_name, operating_system, program, options)
+    if not done:
+        return False, None
+
+    with measure_build_phase(program_name, 'idl_conversion'):
+        result = _convert_idl_for_anchorpy(program_name)
+    if result is None:
+        return False, None
+
+    # Anchorpy initialization phase
+    if program_id: # If deploy succeed, initialize anchorpy
+        with measure_build_phase(program_name, 'client_gen'):
+            _initialize_anchorpy(program_name, program_id, operating_system)
+        if key is not None:
+            with measure_build_phase(program_name, 'cache_save'):
+                save_build(program_name, key, program_id)
+
+    return True, program_id
+
+def _compile_programs_batch(file_names, programs, operating_system, max_workers, options):
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(file_names)))
+    print(f"Building {len(file_names)} programs with {max_workers} parallel workers...")
+
+    # Cargo threads are split among the workers, so that builds do not oversubscribe the cores
+    cargo_jobs = max(1, (os.cpu_count() or 1) // max_workers)
+
+    # The template is created before the workers start, so that they do not race to create it. Its build
+    # compiles the dependencies once for all the workers
+    if options['shared_target']:
+        if not prepare_workspace_template(operating_system, options['vendored']):
+            return None
+        prepare_shared_targets(operating_system, max_workers, options['vendored'])
+
+    # Each worker gets a slot, used to pick its own shared target folder
+    slot_queue = multiprocessing.Queue()
+    for slot in range(max_workers):
+        slot_queue.put(slot)
+
+    summary = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=set_worker_slot, initargs=(slot_queue,)) as executor:
+        futures = [executor.submit(_build_program, file_name, program, operating_system, cargo_jobs, options)
+                   for file_name, program in zip(file_names, programs)]
+        for future in as_completed(futures):
+            result = future.result()
+            status = 'built' if result['success'] else 'FAILED'
+            print(f"{result['program']}: {status} in {result['seconds']:.0f}s")
+            summary.append(result)
+
+    summary.sort(key=lambda result: result['program'])
+    _write_build_summary(summary)
+    return summary
+
+def _build_program(file_name, program, operating_system, cargo_jobs, options):
+    # Runs in a worker process. Everything printed by the phases goes to the program log
+    os.environ['CARGO_BUILD_JOBS'] = str(cargo_jobs)
+    program_name = file_name.removesuffix(".rs")
+    idl_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
+    log = io.StringIO()
+    start = time.monotonic()
+
+    with contextlib.redirect_stdout(log):
+        start_build_report(program_name, program, options)
+        try:
+            done, program_id = _build_program_phases(program_name, operating_system, program, options)
+        except Exception as e:
+            print(f"Error building {program_name}: {e}")
+            done, program_id = False, None
+        report = finish_build_report(program_name, done)
+
+    build_output = _build_outputs.pop(program_name, '')
+    return {
+        'program': program_name,
+        'success': done,
+        'program_id': program_id,
+        'idl_path': idl_path if done else None,
+        'seconds': time.monotonic() - start,
+        'phases': report['phases'],
+        'log': log.getvalue() + build_output
+    }
+
+def _write_build_summary(summary):
+    # Logs are written next to each program, the summary references them
+    for result in summary:
+        log_path = f"{anchor_base_path}/.anchor_files/{result['program']}/build.log"
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, 'w') as file:
+            file.write(result.pop('log'))
+        result['log_path'] = log_path
+
+    summary_path = f"{anchor_base_path}/.anchor_files/build_summary.json"
+    with open(summary_path, 'w') as file:
+        json.dump(summary, file, indent=2)
+
+    built = sum(1 for result in summary if result['success'])
+    print(f"{built}/{len(summary)} programs built successfully.")
+    for result in summary:
+        if result['success']:
+            print(f"  {result['program']}: program ID {result['program_id']}, IDL {result['idl_path']}")
+        else:
+            print(f"  {result['program']}: failed, see {result['log_path']}")
+    print(f"Build summary written to {summary_path}")
+
 def _read_rs_files(programs_path):
     # Check if the folder exists
     if not os.path.isdir(programs_path):
@@ -115,23 +289,23 @@ def _detect_dependencies_from_code(program_code):
     
     # Check for pyth_sdk_solana
     if 'use pyth_sdk_solana' in program_code or 'pyth_sdk_solana::' in program_code:
-        dependencies['pyth-sdk-solana'] = "0.10"
+        dependencies['pyth-sdk-solana'] = _PINNED_VERSIONS['pyth-sdk-solana']
     
     # Check for switchboard
     if 'use switchboard_' in program_code or 'switchboard_' in program_code:
-        dependencies['switchboard-solana'] = "0.29"
+        dependencies['switchboard-solana'] = _PINNED_VERSIONS['switchboard-solana']
     
     # Check for spl-token (but don't add it directly if anchor-spl is present)
     if 'use spl_token' in program_code or 'spl_token::' in program_code:
-        dependencies['spl-token'] = "7.0"
+        dependencies['spl-token'] = _PINNED_VERSIONS['spl-token']
     
     # Check for spl-associated-token-account
     if 'use spl_associated_token_account' in program_code or 'spl_associated_token_account::' in program_code:
-        dependencies['spl-associated-token-account'] = "4.0"
+        dependencies['spl-associated-token-account'] = _PINNED_VERSIONS['spl-associated-token-account']
     
     # Check for mpl-token-metadata
     if 'use mpl_token_metadata' in program_code or 'mpl_token_metadata::' in program_code:
-        dependencies['mpl-token-metadata'] = "4.1"
+        dependencies['mpl-token-metadata'] = _PINNED_VERSIONS['mpl-token-metadata']
     
     return dependencies
 
@@ -161,6 +335,8 @@ def _check_for_anchor_spl_usage(program_code):
 # Currently detects: pyth-sdk-solana, switchboard-solana,
 # spl-token, spl-associated-token-account, and mpl-token-metadata
 def addInitIfNeeded(cargo_path, program_code):
+    import toml
+
     try:
         # We modify the files, only if it exists
         if os.path.exists(cargo_path):
@@ -192,7 +368,7 @@ def addInitIfNeeded(cargo_path, program_code):
             else:
                 # anchor-lang doesn't exist, add it
                 cargo_config['dependencies']['anchor-lang'] = {
-                    'version': "0.31.1",
+                    'version': _PINNED_VERSIONS['anchor-lang'],
                     'features': ['init-if-needed']
                 }
                 print("Added anchor-lang dependency with init-if-needed feature")
@@ -200,8 +376,8 @@ def addInitIfNeeded(cargo_path, program_code):
             # Add anchor-spl if needed and not already present
             if needs_anchor_spl:
                 if 'anchor-spl' not in cargo_config['dependencies']:
-                    cargo_config['dependencies']['anchor-spl'] = "0.31.1"
-                    print(f"Added dependency: anchor-spl = \"0.31.1\"")
+                    cargo_config['dependencies']['anchor-spl'] = _PINNED_VERSIONS['anchor-spl']
+                    print(f"Added dependency: anchor-spl = \"{_PINNED_VERSIONS['anchor-spl']}\"")
                 
                 # Ensure features section exists
                 if 'features' not in cargo_config:
@@ -254,8 +430,8 @@ def addInitIfNeeded(cargo_path, program_code):
             
             if any(indicator in program_code for indicator in token_indicators):
                 if 'spl-token' not in cargo_config['dependencies']:
-                    cargo_config['dependencies']['spl-token'] = "7.0"
-                    print(f"Added dependency: spl-token = \"7.0\" (detected token usage)")
+                    cargo_config['dependencies']['spl-token'] = _PINNED_VERSIONS['spl-token']
+                    print(f"Added dependency: spl-token = \"{_PINNED_VERSIONS['spl-token']}\" (detected token usage)")
             
             # Ensure all required features are present
             required_features = ['default', 'cpi', 'no-entrypoint', 'no-idl', 'no-log-ix-name']
@@ -296,55 +472,103 @@ def addInitIfNeeded(cargo_path, program_code):
     return True
 
 
-def _compile_program(program_name, operating_system, program):
-    # Initialization phase
-    done = _perform_anchor_initialization(program_name, operating_system)
+def _compile_program(program_name, operating_system, program, options):
+    # Initialization phase. With a shared target, a prebuilt workspace template is cloned instead
+    with measure_build_phase(program_name, 'anchor_init'):
+        if options['shared_target']:
+            done = clone_workspace_template(program_name, operating_system, options['vendored'])
+        else:
+            done = _perform_anchor_initialization(program_name, operating_system, options['vendored'])
     if not done:
-        return False
+        return False, None
     else:
         # After initialization, create/modify the Cargo.toml file with the desired feature and dependencies
-        cargo_toml_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/programs/anchor_environment/Cargo.toml"
-        addInitIfNeeded(cargo_toml_path, program)
+        with measure_build_phase(program_name, 'cargo_toml_patching'):
+            cargo_toml_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/programs/anchor_environment/Cargo.toml"
+            addInitIfNeeded(cargo_toml_path, program)
+            if options['vendored']:
+                configure_offline_build(program_name)
         
         
     
 
     # Build phase
-    done, program_id = _perform_anchor_build(program_name, program, operating_system)
+    if options['shared_target']:
+        use_shared_target(program_name)
+    try:
+        done, program_id = _perform_anchor_build(program_name, program, operating_system, options)
+    finally:
+        if options['shared_target']:
+            collect_shared_artifacts(program_name)
     if not done:
-        return False
+        return False, None
 
     return True, program_id
 
-def _perform_anchor_initialization(program_name, operating_system):
+def _perform_anchor_initialization(program_name, operating_system, vendored=False):
     # Define Anchor initialization commands to be executed
     initialization_commands = [
         f"mkdir -p {anchor_base_path}/.anchor_files/{program_name}", # Create folder for new program
         f"cd {anchor_base_path}/.anchor_files/{program_name}",  # Change directory to new folder
-        "anchor init anchor_environment",  # Initialize anchor environment
+        # Initialize anchor environment. Offline, without the JavaScript dependencies, which need the network
+        "anchor init anchor_environment --no-install" if vendored else "anchor init anchor_environment"
     ]
 
     # Merge commands with '&&' to execute them on the same shell
     initialization_concatenated_command = " && ".join(initialization_commands)
 
     # Run Anchor initialization
-    return _run_anchor_initialization_commands(operating_system, initialization_concatenated_command)
+    if not _run_anchor_initialization_commands(operating_system, initialization_concatenated_command):
+        return False
+
+    # Warnings on stderr are ignored, but the environment must exist
+    if not os.path.exists(f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"):
+        print(f"Error initializing the Anchor environment of {program_name}.")
+        return False
+    return True
 
     
 
-def _perform_anchor_build(program_name, program, operating_system):
+def _perform_anchor_build(program_name, program, operating_system, options):
+    environment_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment"
+
+    # Versions are pinned by the vendored lockfile, updating would need the crates.io index
+    if not options['vendored']:
+        # bytemyck_derive is now 1.9.2, but can change frequently
+        with measure_build_phase(program_name, 'cargo_update'):
+            result = run_command(operating_system, f"cd {environment_path} && cargo update -p bytemuck_derive@1.9.3")
+        if result is None:
+            print("Unsupported operating system.")
+            return False, None
+        if result.returncode != 0:
+            # As in the original '&&' chain, the build does not run if the update fails
+            print(result.stderr)
+            return False, None
+
     # Define Anchor build commands to be executed
     build_commands = [
-        f"cd {anchor_base_path}/.anchor_files/{program_name}/anchor_environment",  # Change directory to new anchor environment
-        "cargo update -p bytemuck_derive@1.9.3", # bytemyck_derive is now 1.9.2, but can change frequently
-        "anchor build"  # Build program
+        f"cd {environment_path}",  # Change directory to new anchor environment
+        # Arguments after the first '--' go to cargo build-sbf, which passes to cargo the ones after its own '--'
+        "anchor build -- -- --timings" if options['cargo_timings'] else "anchor build"  # Build program
     ]
 
     # Merge commands with '&&' to execute them on the same shell
     build_concatenated_command = " && ".join(build_commands)
 
     # Run Anchor build
-    return _run_anchor_build_commands(program_name, program, operating_system, build_concatenated_command)
+    with measure_build_phase(program_name, 'anchor_build'):
+        build_result = _run_anchor_build_commands(program_name, program, operating_system, build_concatenated_command)
+
+    # Cargo writes its timing report in the target folder in use, which may be shared with other programs
+    if options['cargo_timings']:
+        target_path = os.environ.get('CARGO_TARGET_DIR', os.path.join(environment_path, 'target'))
+        timings_path = os.path.join(target_path, 'cargo-timings', 'cargo-timing.html')
+        if os.path.exists(timings_path):
+            report_timings_path = f"{anchor_base_path}/.anchor_files/{program_name}/cargo-timing.html"
+            os.replace(timings_path, report_timings_path)
+            add_build_report_details(program_name, cargo_timings_path=report_timings_path)
+
+    return build_result
 
 def _run_anchor_initialization_commands(operating_system, initialization_concatenated_command):
     # Initialize Anchor project
@@ -364,18 +588,33 @@ def _run_anchor_initialization_commands(operating_system, initialization_concate
 def _run_anchor_build_commands(program_name, program, operating_system, build_concatenated_command):
     print("Building Anchor program, this may take a while... Please be patient.")
     program_id = _write_program_in_lib_rs(program_name, program)
+
+    # The binary of a previous build must not be mistaken for the output of this one
+    environment_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment"
+    target_path = os.environ.get('CARGO_TARGET_DIR', os.path.join(environment_path, 'target'))
+    binary_path = os.path.join(target_path, 'deploy', 'anchor_environment.so')
+    if os.path.exists(binary_path):
+        os.remove(binary_path)
+
     result = run_command(operating_system, build_concatenated_command)
     if result is None:
         print("Unsupported operating system.")
-        return False
+        return False, None
     elif '-Znext' in result.stderr:
         # try by imposing cargo version 3
         _impose_cargo_lock_version(program_name)
         result = run_command(operating_system, build_concatenated_command)
         if result.stderr:
             print(result.stderr)
+    _build_outputs[program_name] = f"{result.stdout}\n{result.stderr}"
 
-    return True, program_id # Sometimes stderr is just a warning, so we return true anyway
+    # Sometimes stderr is just a warning, the build only failed if the program binary is missing
+    if not os.path.exists(binary_path):
+        print(f"Build of {program_name} failed: {binary_path} was not produced.")
+        if result.stderr:
+            print(result.stderr)
+        return False, None
+    return True, program_id
 
 def _write_program_in_lib_rs(program_name, program):
     program, program_id = _update_program_id(program_name, program)
@@ -570,9 +809,12 @@ def _deploy_program(program_name, operating_system):
     deploy_concatenated_command = " && ".join(deploy_commands)
 
     # Run Anchor deploy
-    _run_deploying_commands(operating_system, deploy_concatenated_command)
+    with measure_build_phase(program_name, 'deploy'):
+        _run_deploying_commands(operating_system, deploy_concatenated_command)
 
 def _modify_cluster_wallet(program_name, cluster, wallet_name):
+    import toml
+
     file_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"
     config = toml.load(file_path)
 
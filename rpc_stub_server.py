@@ -0,0 +1,271 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+
+
+_BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_LAMPORTS_PER_SIGNATURE = 5000
+
+# Blocks after which a blockhash expires
+_BLOCKHASH_VALIDITY = 150
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def start_rpc_stub(host='127.0.0.1', port=8899, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None,
+                         slot_duration=0.4, confirmation_slots=1, compute_units=5000, seed=None):
+    # Local stand-in for a cluster RPC node, implementing the methods used by the trace runner
+    stub = {
+        'latency': latency,  # Seconds waited before answering each request
+        'jitter': jitter,  # Random extra latency, up to this many seconds
+        'error_rate': error_rate,  # Fraction of requests answered with an RPC error
+        'rate_limit': rate_limit,  # Requests per second accepted before answering 429, None for no limit
+        'slot_duration': slot_duration,
+        'confirmation_slots': confirmation_slots,  # Slots after which a sent transaction is confirmed
+        'compute_units': compute_units,  # Units consumed by every simulated transaction
+        'rng': random.Random(seed),
+        'started_at': time.monotonic(),
+        'tokens': rate_limit,
+        'tokens_updated_at': time.monotonic(),
+        'signatures': dict(),
+        'requests': dict()
+    }
+    stub['server'] = await asyncio.start_server(lambda reader, writer: _serve_connection(stub, reader, writer),
+                                                host, port)
+    bound_port = stub['server'].sockets[0].getsockname()[1]
+    stub['endpoint'] = f"http://{host}:{bound_port}"
+    return stub
+
+async def stop_rpc_stub(stub):
+    stub['server'].close()
+    await stub['server'].wait_closed()
+
+def rpc_stub_stats(stub):
+    # Number of requests received for each method
+    return dict(stub['requests'])
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _serve_connection(stub, reader, writer):
+    # HTTP/1.1 with keep-alive, as used by the RPC clients
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+
+            headers = dict()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode().partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+            status, response = await _handle_request(stub, body)
+            payload = json.dumps(response).encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+            await writer.drain()
+
+            if headers.get('connection', '').lower() == 'close':
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def _handle_request(stub, body):
+    if not _take_token(stub):
+        return '429 Too Many Requests', {'jsonrpc': '2.0', 'error': {'code': 429, 'message': 'Too many requests'},
+                                         'id': None}
+
+    delay = stub['latency'] + stub['rng'].uniform(0, stub['jitter'])
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    try:
+        request = json.loads(body)
+    except ValueError:
+        return '200 OK', {'jsonrpc': '2.0', 'error': {'code': -32700, 'message': 'Parse error'}, 'id': None}
+
+    # Batch requests are answered with a list
+    if isinstance(request, list):
+        return '200 OK', [_handle_call(stub, call) for call in request]
+    return '200 OK', _handle_call(stub, request)
+
+def _take_token(stub):
+    # Token bucket refilled at rate_limit tokens per second
+    if stub['rate_limit'] is None:
+        return True
+    now = time.monotonic()
+    elapsed = now - stub['tokens_updated_at']
+    stub['tokens'] = min(max(stub['rate_limit'], 1), stub['tokens'] + elapsed * stub['rate_limit'])
+    stub['tokens_updated_at'] = now
+    if stub['tokens'] < 1:
+        return False
+    stub['tokens'] -= 1
+    return True
+
+def _handle_call(stub, call):
+    method = call.get('method')
+    params = call.get('params') or []
+    stub['requests'][method] = stub['requests'].get(method, 0) + 1
+
+    if stub['rng'].random() < stub['error_rate']:
+        return {'jsonrpc': '2.0', 'error': {'code': -32005, 'message': 'Node is unhealthy'}, 'id': call.get('id')}
+
+    handler = _METHODS.get(method)
+    if handler is None:
+        return {'jsonrpc': '2.0', 'error': {'code': -32601, 'message': 'Method not found'}, 'id': call.get('id')}
+    try:
+        result = handler(stub, params)
+    except (ValueError, IndexError, TypeError) as e:
+        return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': f'Invalid params: {e}'}, 'id': call.get('id')}
+    return {'jsonrpc': '2.0', 'result': result, 'id': call.get('id')}
+
+def _current_slot(stub):
+    return int((time.monotonic() - stub['started_at']) / stub['slot_duration'])
+
+def _context(stub, value):
+    return {'context': {'slot': _current_slot(stub)}, 'value': value}
+
+def _get_slot(stub, params):
+    return _current_slot(stub)
+
+def _get_latest_blockhash(stub, params):
+    # A new blockhash for every slot, derived from the slot number
+    slot = _current_slot(stub)
+    blockhash = _b58encode(hashlib.sha256(f"blockhash-{slot}".encode()).digest())
+    return _context(stub, {'blockhash': blockhash, 'lastValidBlockHeight': slot + _BLOCKHASH_VALIDITY})
+
+def _get_fee_for_message(stub, params):
+    # Versioned messages start with a prefix byte, the number of required signatures follows
+    message = base64.b64decode(params[0])
+    required_signatures = message[1] if message[0] & 0x80 else message[0]
+    return _context(stub, required_signatures * _LAMPORTS_PER_SIGNATURE)
+
+def _send_transaction(stub, params):
+    # The transaction ID is its first signature, after the compact length of the signatures list
+    transaction = base64.b64decode(params[0])
+    offset = 1
+    while transaction[offset - 1] & 0x80:
+        offset += 1
+    signature = _b58encode(transaction[offset:offset + 64])
+    stub['signatures'][signature] = _current_slot(stub)
+    return signature
+
+def _get_signature_statuses(stub, params):
+    slot = _current_slot(stub)
+    statuses = []
+    for signature in params[0]:
+        sent_slot = stub['signatures'].get(signature)
+        if sent_slot is None:
+            statuses.append(None)
+            continue
+        confirmations = slot - sent_slot
+        if confirmations >= stub['confirmation_slots']:
+            confirmation_status = 'finalized' if confirmations >= 32 else 'confirmed'
+        else:
+            confirmation_status = 'processed'
+        statuses.append({
+            'slot': sent_slot,
+            'confirmations': None if confirmation_status == 'finalized' else confirmations,
+            'err': None,
+            'status': {'Ok': None},
+            'confirmationStatus': confirmation_status
+        })
+    return _context(stub, statuses)
+
+def _simulate_transaction(stub, params):
+    # Every simulation succeeds and consumes the same compute units
+    return _context(stub, {'err': None, 'logs': [], 'accounts': None, 'unitsConsumed': stub['compute_units'],
+                           'returnData': None})
+
+def _get_account_info(stub, params):
+    # No account exists on the stand-in
+    return _context(stub, None)
+
+def _b58encode(data):
+    number = int.from_bytes(data, 'big')
+    encoded = ''
+    while number > 0:
+        number, remainder = divmod(number, 58)
+        encoded = _BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b'\0'))
+    return '1' * leading_zeros + encoded
+
+
+_METHODS = {
+    'getSlot': _get_slot,
+    'getLatestBlockhash': _get_latest_blockhash,
+    'getFeeForMessage': _get_fee_for_message,
+    'sendTransaction': _send_transaction,
+    'getSignatureStatuses': _get_signature_statuses,
+    'simulateTransaction': _simulate_transaction,
+    'getAccountInfo': _get_account_info
+}
+
+
+async def _main(options):
+    stub = await start_rpc_stub(options.host, options.port, options.latency, options.jitter, options.error_rate,
+                                options.rate_limit, options.slot_duration, options.confirmation_slots,
+                                options.compute_units, options.seed)
+    print(f"RPC stand-in listening on {stub['endpoint']}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stop_rpc_stub(stub)
+        print(f"Requests served: {rpc_stub_stats(stub)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for a cluster JSON-RPC node.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds waited before each answer")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random extra latency, in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument('--rate-limit', type=float, help="Requests per second accepted")
+    parser.add_argument('--slot-duration', type=float, default=0.4, help="Seconds per slot")
+    parser.add_argument('--confirmation-slots', type=int, default=1, help="Slots before a transaction is confirmed")
+    parser.add_argument('--compute-units', type=int, default=5000, help="Units consumed by each simulation")
+    parser.add_argument('--seed', type=int, help="Seed of latency and error injection")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
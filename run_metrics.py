@@ -0,0 +1,175 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import bisect
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+# Histogram buckets: geometric upper bounds from 1 microsecond to about 8 minutes, 20% apart
+_BUCKET_BOUNDS = [1e-6 * 1.2 ** i for i in range(115)]
+_PERCENTILES = [50, 90, 95, 99]
+
+_settings = {
+    'live': False,  # Show a single summary line instead of a line per row
+    'interval': 1.0  # Seconds between updates of the summary line
+}
+
+_histograms = dict()  # Stage -> {'count', 'total', 'max', 'buckets'}
+_progress = {'rows': 0, 'started_at': None, 'printed_at': 0.0}
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def configure_metrics(live=None, interval=None):
+    if live is not None:
+        _settings['live'] = live
+    if interval is not None:
+        _settings['interval'] = interval
+
+def reset_metrics():
+    _histograms.clear()
+    _progress['rows'] = 0
+    _progress['started_at'] = time.monotonic()
+    _progress['printed_at'] = 0.0
+
+@contextmanager
+def measure_stage(stage):
+    # Time spent in the block, also while awaiting, is recorded under the stage
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+def record_stage(stage, duration):
+    # Only bucket counts are kept, so that memory does not grow with the trace length
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        histogram = {'count': 0, 'total': 0.0, 'max': 0.0, 'buckets': [0] * (len(_BUCKET_BOUNDS) + 1)}
+        _histograms[stage] = histogram
+    histogram['count'] += 1
+    histogram['total'] += duration
+    histogram['max'] = max(histogram['max'], duration)
+    histogram['buckets'][bisect.bisect_left(_BUCKET_BOUNDS, duration)] += 1
+
+def metrics_summary():
+    summary = dict()
+    for stage, histogram in _histograms.items():
+        stage_summary = {
+            'count': histogram['count'],
+            'total': histogram['total'],
+            'mean': histogram['total'] / histogram['count'],
+            'max': histogram['max']
+        }
+        for percentile in _PERCENTILES:
+            stage_summary[f'p{percentile}'] = _estimate_percentile(histogram, percentile)
+        summary[stage] = stage_summary
+    return summary
+
+def export_metrics(file_path_without_extension):
+    summary = metrics_summary()
+    elapsed = time.monotonic() - _progress['started_at'] if _progress['started_at'] is not None else 0.0
+
+    # JSON with the full histograms, CSV with one row per stage
+    with open(f"{file_path_without_extension}.json", 'w') as file:
+        json.dump({
+            'rows': _progress['rows'],
+            'elapsed_seconds': elapsed,
+            'stages': summary,
+            'histograms': {stage: {'bucket_upper_bounds': _BUCKET_BOUNDS + [None], 'counts': histogram['buckets']}
+                           for stage, histogram in _histograms.items()}
+        }, file, indent=2)
+
+    fields = ['count', 'total', 'mean'] + [f'p{percentile}' for percentile in _PERCENTILES] + ['max']
+    with open(f"{file_path_without_extension}.csv", 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['stage'] + [field if field == 'count' else f'{field}_seconds' for field in fields])
+        for stage, stage_summary in summary.items():
+            writer.writerow([stage] + [stage_summary[field] for field in fields])
+
+    return f"{file_path_without_extension}.json", f"{file_path_without_extension}.csv"
+
+def log_row(message):
+    # Per-row messages are hidden while the live summary is shown
+    if not _settings['live']:
+        print(message)
+
+def log_message(message):
+    # Messages that are always shown. The live summary line is cleared and drawn again below them
+    if not _settings['live'] or _progress['printed_at'] == 0.0:
+        print(message)
+        return
+    sys.stdout.write(f"\r\033[K{message}\n")
+    _print_live_summary(time.monotonic())
+
+def row_completed(n_rows=1):
+    _progress['rows'] += n_rows
+    if not _settings['live']:
+        return
+
+    now = time.monotonic()
+    if now - _progress['printed_at'] >= _settings['interval']:
+        _progress['printed_at'] = now
+        _print_live_summary(now)
+
+def finish_live_summary():
+    if _settings['live']:
+        _print_live_summary(time.monotonic())
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+        _progress['printed_at'] = 0.0
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _estimate_percentile(histogram, percentile):
+    # Upper bound of the bucket holding the percentile, never above the maximum seen
+    target = histogram['count'] * percentile / 100
+    seen = 0
+    for i, count in enumerate(histogram['buckets']):
+        seen += count
+        if seen >= target and count > 0:
+            return min(_BUCKET_BOUNDS[i], histogram['max']) if i < len(_BUCKET_BOUNDS) else histogram['max']
+    return histogram['max']
+
+def _print_live_summary(now):
+    elapsed = now - _progress['started_at'] if _progress['started_at'] is not None else 0.0
+    rate = _progress['rows'] / elapsed if elapsed > 0 else 0.0
+    line = f"{_progress['rows']} rows | {rate:.1f} rows/s"
+
+    # Median latency of the slowest stages
+    stages = sorted(_histograms.items(), key=lambda item: item[1]['total'], reverse=True)[:3]
+    for stage, histogram in stages:
+        line += f" | {stage} p50 {_estimate_percentile(histogram, 50) * 1000:.1f} ms"
+
+    sys.stdout.write(f"\r{line}\033[K")
+    sys.stdout.flush()
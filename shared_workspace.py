@@ -0,0 +1,177 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import glob
+import os
+import shutil
+from solana_module.solana_utils import run_command
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+from solana_module.anchor_module.vendored_registry import configure_offline_build
+
+
+# Files of the template that are not copied: build outputs, git history, JavaScript dependencies and the
+# cargo configuration used to build the template itself
+_TEMPLATE_IGNORED = shutil.ignore_patterns('target', '.git', 'node_modules', '.cargo')
+_PROGRAM_KEYPAIR = 'target/deploy/anchor_environment-keypair.json'
+
+# Each build process uses its own target folder, so that concurrent builds never overwrite each other's artifacts
+_worker = {'slot': 0}
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def set_worker_slot(slot_queue):
+    # Process pool initializer: every worker takes a different slot
+    _worker['slot'] = slot_queue.get()
+
+def shared_target_dir():
+    return _target_path(_worker['slot'])
+
+def prepare_shared_targets(operating_system, n_slots, vendored=False):
+    # Dependencies are compiled once, by building the template, and every slot starts from them. Slots built
+    # by previous runs are kept as they are
+    first_target_path = _target_path(0)
+    if not os.path.isdir(first_target_path):
+        print("Compiling the shared dependencies...")
+        template_path = _template_path()
+        if vendored:
+            # The template is laid out like the environment of a program named .workspace_template
+            configure_offline_build(os.path.basename(os.path.dirname(template_path)))
+        else:
+            shutil.rmtree(os.path.join(template_path, '.cargo'), ignore_errors=True)
+
+        commands = [f"cd {template_path}"]
+        if not vendored:
+            commands.append("cargo update -p bytemuck_derive@1.9.3")
+        commands.append("anchor build")
+        os.environ['CARGO_TARGET_DIR'] = first_target_path
+        try:
+            result = run_command(operating_system, " && ".join(commands))
+        finally:
+            os.environ.pop('CARGO_TARGET_DIR', None)
+        if result is None or result.returncode != 0:
+            # Not fatal: every slot compiles the dependencies with its first program instead
+            print("Error compiling the shared dependencies, each worker will compile them.")
+            if result is not None and result.stderr:
+                print(result.stderr)
+            shutil.rmtree(first_target_path, ignore_errors=True)
+            return False
+
+        # Only the dependencies are kept, the template program is not an artifact of any program
+        for folder in ['deploy', 'idl', 'types']:
+            shutil.rmtree(os.path.join(first_target_path, folder), ignore_errors=True)
+
+    for slot in range(1, n_slots):
+        if not os.path.isdir(_target_path(slot)):
+            shutil.copytree(first_target_path, _target_path(slot), copy_function=_link_artifact)
+    return True
+
+def prepare_workspace_template(operating_system, vendored=False):
+    # The template is initialized once, then cloned for every program
+    template_path = _template_path()
+    if os.path.exists(os.path.join(template_path, 'Anchor.toml')):
+        return True
+
+    print("Creating workspace template...")
+    # Offline, the JavaScript dependencies are not installed, since that needs the network
+    init_command = "anchor init anchor_environment --no-install" if vendored else "anchor init anchor_environment"
+    result = run_command(operating_system, f"mkdir -p {os.path.dirname(template_path)} && "
+                                           f"cd {os.path.dirname(template_path)} && {init_command}")
+    if result is None or not os.path.exists(os.path.join(template_path, 'Anchor.toml')):
+        print("Error creating workspace template.")
+        if result is not None and result.stderr:
+            print(result.stderr)
+        return False
+    return True
+
+def clone_workspace_template(program_name, operating_system, vendored=False):
+    if not prepare_workspace_template(operating_system, vendored):
+        return False
+
+    template_path = _template_path()
+    environment_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment"
+    shutil.copytree(template_path, environment_path, ignore=_TEMPLATE_IGNORED, dirs_exist_ok=True)
+
+    # Every program needs its own keypair, otherwise all of them would share the template program ID
+    commands = [
+        f"cd {environment_path}",
+        f"solana-keygen new --no-bip39-passphrase --silent --force -o {_PROGRAM_KEYPAIR}",
+        "anchor keys sync"
+    ]
+    result = run_command(operating_system, " && ".join(commands))
+    if result is None or not os.path.exists(os.path.join(environment_path, _PROGRAM_KEYPAIR)):
+        print("Error generating the program keypair.")
+        if result is not None and result.stderr:
+            print(result.stderr)
+        return False
+    return True
+
+def use_shared_target(program_name):
+    # Dependencies compiled for a program are reused by the next ones built by the same process
+    target_path = shared_target_dir()
+    os.makedirs(os.path.join(target_path, 'deploy'), exist_ok=True)
+    os.environ['CARGO_TARGET_DIR'] = target_path
+
+    # The program keypair is needed also next to the shared artifacts
+    environment_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment"
+    keypair_path = os.path.join(environment_path, _PROGRAM_KEYPAIR)
+    if os.path.exists(keypair_path):
+        shutil.copy2(keypair_path, os.path.join(target_path, 'deploy', os.path.basename(keypair_path)))
+
+def collect_shared_artifacts(program_name):
+    # Later commands (e.g. deploy) must use the program folder again
+    os.environ.pop('CARGO_TARGET_DIR', None)
+
+    # Program binary and IDL are copied where the rest of the toolchain expects them
+    target_path = shared_target_dir()
+    environment_target_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target"
+    for folder, pattern in [('deploy', '*.so'), ('idl', '*.json'), ('types', '*.ts')]:
+        os.makedirs(os.path.join(environment_target_path, folder), exist_ok=True)
+        for artifact in glob.glob(os.path.join(target_path, folder, pattern)):
+            shutil.copy2(artifact, os.path.join(environment_target_path, folder, os.path.basename(artifact)))
+            os.remove(artifact)
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _template_path():
+    return f"{anchor_base_path}/.anchor_files/.workspace_template/anchor_environment"
+
+def _target_path(slot):
+    return f"{anchor_base_path}/.anchor_files/.cargo_target/{slot}"
+
+def _link_artifact(source, destination):
+    # Compiled crates are hard linked, so that slots do not multiply disk use. Cargo writes rebuilt crates
+    # to new files, while fingerprints are rewritten in place and are therefore copied
+    if f"{os.sep}.fingerprint{os.sep}" not in source:
+        try:
+            os.link(source, destination)
+            return destination
+        except OSError:
+            pass
+    return shutil.copy2(source, destination)
@@ -0,0 +1,106 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import asyncio
+import time
+from solana_module.anchor_module.run_metrics import log_message
+
+
+_NOMINAL_SLOT_DURATION = 0.4  # Seconds per slot targeted by the cluster
+_POLL_MARGIN_SLOTS = 2  # Slots before the predicted deadline at which the slot is checked again
+_SMOOTHING = 0.3  # Weight of the latest measurement in the slot duration estimate
+
+# Measured seconds per slot, per client
+_slot_durations = dict()
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def wait_for_slots(client, n_slots, websocket_endpoint=None):
+    first_slot = await _get_slot(client)
+    target_slot = first_slot + n_slots
+    log_message(f"Waiting for {n_slots} slots (target slot {target_slot})...")
+
+    # Prefer slot notifications, fall back to predicted polling when they are not available
+    current_slot = None
+    if websocket_endpoint is not None:
+        try:
+            current_slot = await _wait_with_subscription(websocket_endpoint, target_slot)
+        except Exception as e:
+            log_message(f"Slot subscription not available ({e}), falling back to polling.")
+    if current_slot is None:
+        current_slot = await _wait_with_prediction(client, first_slot, target_slot)
+
+    log_message(f"Target reached! Current slot: {current_slot}, target was: {target_slot}")
+    return current_slot
+
+def estimated_slot_duration(client):
+    return _slot_durations.get(client, _NOMINAL_SLOT_DURATION)
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _get_slot(client):
+    while True:
+        try:
+            response = await client.get_slot()
+            return response.value
+        except Exception as e:
+            log_message(f"Error checking slot: {e}")
+            await asyncio.sleep(2)
+
+async def _wait_with_subscription(websocket_endpoint, target_slot):
+    from solana.rpc.websocket_api import connect
+
+    async with connect(websocket_endpoint) as websocket:
+        await websocket.slot_subscribe()
+        await websocket.recv()  # Subscription confirmation
+        async for messages in websocket:
+            for message in messages:
+                if message.result.slot >= target_slot:
+                    return message.result.slot
+
+async def _wait_with_prediction(client, slot, target_slot):
+    observed_at = time.monotonic()
+
+    while slot < target_slot:
+        # Sleep until shortly before the predicted deadline, then check the slot again
+        slot_duration = estimated_slot_duration(client)
+        remaining_slots = target_slot - slot
+        await asyncio.sleep(max(remaining_slots - _POLL_MARGIN_SLOTS, 1) * slot_duration)
+
+        new_slot = await _get_slot(client)
+        now = time.monotonic()
+
+        # Refine the slot duration estimate with the latest observation
+        if new_slot > slot:
+            measured_duration = (now - observed_at) / (new_slot - slot)
+            _slot_durations[client] = (1 - _SMOOTHING) * slot_duration + _SMOOTHING * measured_duration
+            slot, observed_at = new_slot, now
+
+    return slot
@@ -0,0 +1,45 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+
+
+# The modules are imported as solana_module.anchor_module.<module>, as in the full toolchain. The package
+# is mapped onto the repository folder, and solana_utils (which lives outside of it) is replaced by a
+# module holding only what the modules import from it.
+_REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SOLANA_BASE_PATH = tempfile.mkdtemp(prefix="solana_module_tests_")
+
+
+def _install_package():
+    if 'solana_module.anchor_module' in sys.modules:
+        return
+
+    solana_module = types.ModuleType('solana_module')
+    solana_module.__path__ = []
+    anchor_module = types.ModuleType('solana_module.anchor_module')
+    anchor_module.__path__ = [_REPOSITORY_PATH]
+    solana_module.anchor_module = anchor_module
+
+    solana_utils = types.ModuleType('solana_module.solana_utils')
+    solana_utils.solana_base_path = _SOLANA_BASE_PATH
+    for name in ['create_client', 'load_keypair_from_file', 'selection_menu', 'choose_wallet', 'run_command',
+                 'choose_cluster']:
+        setattr(solana_utils, name, None)
+    solana_module.solana_utils = solana_utils
+
+    sys.modules['solana_module'] = solana_module
+    sys.modules['solana_module.anchor_module'] = anchor_module
+    sys.modules['solana_module.solana_utils'] = solana_utils
+
+    # The file name does not match the module name used in the imports
+    spec = importlib.util.spec_from_file_location('solana_module.anchor_module.anchor_utils',
+                                                  os.path.join(_REPOSITORY_PATH, 'Anchor_utils.py'))
+    anchor_utils = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = anchor_utils
+    spec.loader.exec_module(anchor_utils)
+    anchor_module.anchor_utils = anchor_utils
+
+
+_install_package()
@@ -0,0 +1,29 @@
+import json
+
+from solana_module.anchor_module.anchor_utils import fetch_signer_accounts, load_compiled_idl
+
+
+_IDL = {'instructions': [{
+    'name': 'withdraw',
+    'accounts': [
+        {'name': 'campaignOwner', 'isMut': True, 'isSigner': True},
+        {'name': 'campaignPda', 'isMut': True, 'isSigner': False},
+        {'name': 'systemProgram', 'isMut': False, 'isSigner': False}
+    ],
+    'args': [{'name': 'amountToWithdraw', 'type': 'u64'}]
+}]}
+
+
+def test_compiled_account_lists_use_the_same_names(tmp_path):
+    idl_file_path = tmp_path / "crowdfund.json"
+    idl_file_path.write_text(json.dumps(_IDL))
+
+    compiled_instruction = load_compiled_idl(str(idl_file_path))['instructions']['withdraw']
+
+    assert compiled_instruction['required_accounts'] == ['campaign_owner', 'campaign_pda']
+    assert compiled_instruction['signer_accounts'] == ['campaign_owner']
+    assert compiled_instruction['writable_accounts'] == ['campaign_owner', 'campaign_pda']
+    assert [arg['name'] for arg in compiled_instruction['args']] == ['amount_to_withdraw']
+
+def test_fetch_signer_accounts_keeps_the_idl_names():
+    assert fetch_signer_accounts('withdraw', _IDL) == ['campaignOwner']
@@ -0,0 +1,101 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from solana_module.anchor_module import build_cache
+
+
+_PROGRAM_ID = 'Counter111111111111111111111111111111111111'
+
+
+@pytest.fixture
+def toolchain(monkeypatch):
+    # Versions printed by the toolchain commands and installed Python packages, changed by the tests
+    versions = {'anchor --version': 'anchor-cli 0.30.1', 'cargo --version': 'cargo 1.79.0',
+                'rustc --version': 'rustc 1.79.0', 'solana --version': 'solana-cli 1.18.17', 'anchorpy': '0.20.1'}
+    monkeypatch.setattr(build_cache, '_toolchain_versions', dict())
+    monkeypatch.setattr(build_cache, 'run_command', lambda operating_system, command: SimpleNamespace(
+        stdout=f"{versions[command]}\n", stderr='', returncode=0))
+    monkeypatch.setattr(build_cache, '_package_version', lambda package: versions[package])
+    return versions
+
+@pytest.fixture
+def anchor_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_cache, 'anchor_base_path', str(tmp_path))
+    return tmp_path / ".anchor_files"
+
+def _key(program_name='counter', program='pub mod counter {}', cargo_configuration=None):
+    return build_cache.build_cache_key(program_name, program, cargo_configuration or [False, []], 'Linux')
+
+def _write_build(anchor_files, program_name, content):
+    # Every cached path, holding the given content
+    for relative_path in build_cache._CACHED_PATHS:
+        path = anchor_files / program_name / relative_path
+        if os.path.basename(relative_path) in ['deploy', 'idl', 'anchorpy_files']:
+            path.mkdir(parents=True, exist_ok=True)
+            path = path / f"{program_name}.out"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+def _read(anchor_files, program_name, relative_path):
+    return (anchor_files / program_name / relative_path).read_text()
+
+
+def test_key_depends_on_program_source_configuration_and_toolchain(toolchain):
+    key = _key()
+
+    assert _key() == key
+    assert _key(program_name='other') != key
+    assert _key(program='pub mod counter { }') != key
+    assert _key(cargo_configuration=[True, []]) != key
+
+def test_key_depends_on_the_anchorpy_version(toolchain, monkeypatch):
+    key = _key()
+
+    toolchain['anchorpy'] = '0.21.0'
+    monkeypatch.setattr(build_cache, '_toolchain_versions', dict())
+    assert _key() != key
+
+def test_saved_build_is_restored(toolchain, anchor_files):
+    _write_build(anchor_files, 'counter', 'first build')
+    key = _key()
+
+    assert build_cache.save_build('counter', key, _PROGRAM_ID)
+
+    # The program folder is rebuilt from scratch, before the Anchor environment is initialized
+    _write_build(anchor_files, 'counter', 'changed')
+    os.remove(anchor_files / 'counter' / 'anchor_environment' / 'Anchor.toml')
+    (anchor_files / 'counter' / 'anchorpy_files' / 'stale_module.py').write_text('stale')
+
+    assert build_cache.restore_build('counter', key) == _PROGRAM_ID
+    assert _read(anchor_files, 'counter', 'anchor_environment/programs/anchor_environment/src/lib.rs') == 'first build'
+    assert _read(anchor_files, 'counter', 'anchorpy_files/counter.out') == 'first build'
+    # Cached folders replace the existing ones instead of being merged into them
+    assert not (anchor_files / 'counter' / 'anchorpy_files' / 'stale_module.py').exists()
+
+def test_unknown_key_is_a_miss(toolchain, anchor_files):
+    assert build_cache.restore_build('counter', _key()) is None
+
+def test_incomplete_build_is_not_saved(toolchain, anchor_files, capsys):
+    _write_build(anchor_files, 'counter', 'build')
+    os.remove(anchor_files / 'counter' / 'anchor_environment' / 'Anchor.toml')
+    key = _key()
+
+    assert not build_cache.save_build('counter', key, _PROGRAM_ID)
+    assert "anchor_environment/Anchor.toml is missing" in capsys.readouterr().out
+    assert build_cache.restore_build('counter', key) is None
+
+def test_restore_keeps_the_deploy_settings(toolchain, anchor_files):
+    toml = pytest.importorskip("toml")
+    anchor_toml_path = anchor_files / 'counter' / 'anchor_environment' / 'Anchor.toml'
+    _write_build(anchor_files, 'counter', 'build')
+    anchor_toml_path.write_text(toml.dumps({'provider': {'cluster': 'Localnet', 'wallet': 'build.json'}}))
+    key = _key()
+    build_cache.save_build('counter', key, _PROGRAM_ID)
+
+    # Deployed after the build was saved
+    anchor_toml_path.write_text(toml.dumps({'provider': {'cluster': 'Devnet', 'wallet': 'deployer.json'}}))
+
+    assert build_cache.restore_build('counter', key) == _PROGRAM_ID
+    assert toml.load(anchor_toml_path)['provider'] == {'cluster': 'Devnet', 'wallet': 'deployer.json'}
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from solana_module.anchor_module import build_report
+
+
+@pytest.fixture(autouse=True)
+def reports_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_report, 'anchor_base_path', str(tmp_path))
+    return tmp_path
+
+
+def test_total_is_the_wall_clock_time_of_the_build():
+    build_report.start_build_report('counter', 'source', {})
+    with build_report.measure_build_phase('counter', 'anchor_build'):
+        time.sleep(0.02)
+    time.sleep(0.02)  # Not in any phase
+
+    report = build_report.finish_build_report('counter', True)
+
+    assert report['success']
+    assert report['total_seconds'] >= 0.04
+    assert report['phases']['anchor_build'] < report['total_seconds']
+
+def test_time_after_the_build_clock_stops_is_not_counted():
+    build_report.start_build_report('counter', 'source', {})
+    with build_report.measure_build_phase('counter', 'anchor_build'):
+        time.sleep(0.01)
+    build_report.stop_build_clock('counter')
+
+    # Waiting at the deploy prompt, then deploying
+    time.sleep(0.05)
+    with build_report.measure_build_phase('counter', 'deploy'):
+        time.sleep(0.01)
+    report = build_report.finish_build_report('counter', True)
+
+    assert report['total_seconds'] < 0.05
+    assert report['phases']['deploy'] >= 0.01
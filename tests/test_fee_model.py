@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+from solana_module.anchor_module.fee_model import estimate_transaction_fee
+
+
+_COMPUTE_BUDGET_PROGRAM_ID = 'ComputeBudget111111111111111111111111111111'
+_PROGRAM_ID = 'Program111111111111111111111111111111111111'
+
+
+def _message(num_required_signatures, instructions):
+    # Only the fields read by the fee model: account keys, header and compiled instructions
+    account_keys = [_PROGRAM_ID, _COMPUTE_BUDGET_PROGRAM_ID]
+    compiled_instructions = [SimpleNamespace(program_id_index=account_keys.index(program_id), data=data)
+                             for program_id, data in instructions]
+    return SimpleNamespace(header=SimpleNamespace(num_required_signatures=num_required_signatures),
+                           account_keys=account_keys, instructions=compiled_instructions)
+
+def _set_compute_unit_limit(units):
+    return _COMPUTE_BUDGET_PROGRAM_ID, bytes([2]) + units.to_bytes(4, 'little')
+
+def _set_compute_unit_price(micro_lamports):
+    return _COMPUTE_BUDGET_PROGRAM_ID, bytes([3]) + micro_lamports.to_bytes(8, 'little')
+
+def _program_instruction():
+    return _PROGRAM_ID, b'\x01\x02'
+
+
+def test_fee_without_priority_is_the_signature_fee():
+    message = _message(2, [_program_instruction()])
+
+    assert estimate_transaction_fee(message) == 10_000
+    assert estimate_transaction_fee(message, signature_lamports=1000) == 2000
+
+def test_priority_fee_uses_the_requested_limit():
+    message = _message(1, [_set_compute_unit_limit(300_000), _set_compute_unit_price(10_000), _program_instruction()])
+
+    # 10,000 micro-lamports for each of the 300,000 units requested
+    assert estimate_transaction_fee(message) == 5000 + 3000
+
+def test_priority_fee_without_limit_uses_the_default_budget_per_instruction():
+    message = _message(1, [_set_compute_unit_price(1_000), _program_instruction(), _program_instruction()])
+
+    # The compute budget instruction itself does not get a default budget
+    assert estimate_transaction_fee(message) == 5000 + 400
+
+def test_priority_fee_is_rounded_up_and_the_limit_capped():
+    rounded = _message(1, [_set_compute_unit_limit(1), _set_compute_unit_price(1), _program_instruction()])
+    capped = _message(1, [_set_compute_unit_limit(2_000_000), _set_compute_unit_price(1_000_000),
+                          _program_instruction()])
+
+    assert estimate_transaction_fee(rounded) == 5001
+    assert estimate_transaction_fee(capped) == 5000 + 1_400_000
+
+def test_priority_fee_of_a_compiled_message():
+    pytest.importorskip("solders")
+    from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+    from solders.hash import Hash
+    from solders.instruction import Instruction
+    from solders.keypair import Keypair
+    from solders.message import MessageV0
+    from solders.pubkey import Pubkey
+
+    payer = Keypair()
+    instructions = [set_compute_unit_limit(100_000), set_compute_unit_price(50_000),
+                    Instruction(Pubkey.new_unique(), b'', [])]
+    message = MessageV0.try_compile(payer.pubkey(), instructions, [], Hash.default())
+
+    assert estimate_transaction_fee(message) == 5000 + 5000
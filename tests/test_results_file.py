@@ -0,0 +1,92 @@
+import csv
+import json
+
+import pytest
+
+from solana_module.anchor_module import automatic_data_insertion_manager as runner
+
+
+@pytest.fixture
+def results_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner, 'anchor_base_path', str(tmp_path))
+    return tmp_path / "execution_traces_results"
+
+def _append(results_file, index, trace_id):
+    runner.append_results(results_file, {'kind': 'instruction', 'index': index, 'trace_id': trace_id},
+                          [{'Trace_ID': trace_id, 'Transaction_Size_Bytes': 100 + index}])
+
+def _read_trace_ids(results_file):
+    with open(results_file['path'], newline='') as file:
+        return [row['Trace_ID'] for row in csv.DictReader(file)]
+
+
+def test_resume_continues_after_the_last_checkpoint(results_folder):
+    results_file = runner.open_results_file("trace", False, "plan")
+    _append(results_file, 1, '1')
+    _append(results_file, 3, '2')
+
+    # A row written after the last checkpoint, e.g. by a run interrupted before saving it
+    results_file['writer'].writerow({'Trace_ID': '3'})
+    runner.close_results_file(results_file)
+
+    resumed = runner.open_results_file("trace", True, "plan")
+    assert resumed['last_row'] == 3
+    assert resumed['last_trace_id'] == '2'
+    _append(resumed, 4, '3')
+    runner.close_results_file(resumed)
+
+    assert _read_trace_ids(resumed) == ['1', '2', '3']
+
+def test_slot_rows_keep_the_last_trace_id(results_folder):
+    results_file = runner.open_results_file("trace", False, "plan")
+    _append(results_file, 1, '1')
+    runner.append_results(results_file, {'kind': 'slot', 'index': 2, 'slots': 1}, [])
+    runner.close_results_file(results_file)
+
+    with open(results_file['checkpoint_path']) as file:
+        checkpoint = json.load(file)
+    assert checkpoint['row'] == 2
+    assert checkpoint['trace_id'] == '1'
+
+def test_fresh_run_discards_the_previous_checkpoint(results_folder):
+    results_file = runner.open_results_file("trace", False, "plan")
+    _append(results_file, 1, '1')
+    runner.close_results_file(results_file)
+
+    restarted = runner.open_results_file("trace", False, "plan")
+    runner.close_results_file(restarted)
+
+    resumed = runner.open_results_file("trace", True, "plan")
+    runner.close_results_file(resumed)
+    assert resumed['last_row'] == 0
+    assert _read_trace_ids(resumed) == []
+
+def test_checkpoint_past_the_end_of_the_file_is_ignored(results_folder, capsys):
+    results_file = runner.open_results_file("trace", False, "plan")
+    _append(results_file, 1, '1')
+    runner.close_results_file(results_file)
+
+    # The results file was replaced, e.g. by hand, after the checkpoint was saved
+    with open(results_file['path'], 'w') as file:
+        file.write("Trace_ID\n")
+
+    resumed = runner.open_results_file("trace", True, "plan")
+    runner.close_results_file(resumed)
+
+    assert resumed['last_row'] == 0
+    assert "Checkpoint does not match the results file" in capsys.readouterr().out
+    with open(resumed['path'], newline='') as file:
+        assert next(csv.reader(file)) == runner._RESULTS_HEADER
+
+def test_checkpoint_of_another_plan_is_ignored(results_folder, capsys):
+    results_file = runner.open_results_file("trace", False, "plan")
+    _append(results_file, 1, '1')
+    runner.close_results_file(results_file)
+
+    # The trace was edited after the checkpoint was saved
+    resumed = runner.open_results_file("trace", True, "edited plan")
+    runner.close_results_file(resumed)
+
+    assert resumed['last_row'] == 0
+    assert _read_trace_ids(resumed) == []
+    assert "Execution trace changed since the checkpoint was saved" in capsys.readouterr().out
@@ -0,0 +1,86 @@
+import csv
+import json
+
+import pytest
+
+from solana_module.anchor_module import run_metrics
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    run_metrics.configure_metrics(live=False)
+    run_metrics.reset_metrics()
+    yield
+    run_metrics.configure_metrics(live=False)
+    run_metrics.reset_metrics()
+
+def _bucket_bound(duration):
+    # Upper bound of the histogram bucket holding the duration
+    return next(bound for bound in run_metrics._BUCKET_BOUNDS if bound >= duration)
+
+
+def test_percentiles_are_within_a_bucket_of_the_exact_value():
+    # 1 ms to 100 ms, uniformly
+    for i in range(1, 101):
+        run_metrics.record_stage('send', i / 1000)
+
+    summary = run_metrics.metrics_summary()['send']
+    assert summary['count'] == 100
+    assert summary['mean'] == pytest.approx(0.0505)
+    assert summary['max'] == pytest.approx(0.1)
+    for percentile in [50, 90, 95, 99]:
+        exact = percentile / 1000
+        assert exact <= summary[f'p{percentile}'] <= _bucket_bound(exact)
+
+def test_percentiles_never_exceed_the_maximum():
+    for _ in range(10):
+        run_metrics.record_stage('blockhash', 0.0105)
+
+    summary = run_metrics.metrics_summary()['blockhash']
+    assert summary['p50'] == summary['p99'] == pytest.approx(0.0105)
+
+def test_slow_outliers_only_move_the_highest_percentiles():
+    for _ in range(98):
+        run_metrics.record_stage('fee_rpc', 0.002)
+    for _ in range(2):
+        run_metrics.record_stage('fee_rpc', 1.5)
+
+    summary = run_metrics.metrics_summary()['fee_rpc']
+    assert summary['p50'] == summary['p95'] == _bucket_bound(0.002)
+    assert summary['p99'] == pytest.approx(1.5)
+
+def test_durations_beyond_the_last_bucket_use_the_maximum():
+    run_metrics.record_stage('confirm', 10_000.0)
+
+    assert run_metrics.metrics_summary()['confirm']['p50'] == 10_000.0
+
+def test_export_writes_the_summary(tmp_path):
+    with run_metrics.measure_stage('compile_and_sign'):
+        pass
+    run_metrics.row_completed(3)
+
+    json_path, csv_path = run_metrics.export_metrics(str(tmp_path / "run_metrics"))
+
+    with open(json_path) as file:
+        exported = json.load(file)
+    assert exported['rows'] == 3
+    assert exported['stages']['compile_and_sign']['count'] == 1
+    with open(csv_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row['stage'] for row in rows] == ['compile_and_sign']
+    assert 'p99_seconds' in rows[0]
+
+def test_messages_redraw_the_live_summary(capsys):
+    run_metrics.configure_metrics(live=True, interval=0)
+    run_metrics.record_stage('send', 0.01)
+    run_metrics.row_completed()
+    run_metrics.log_row("hidden while the summary is shown")
+    run_metrics.log_message("Slot subscription not available")
+    run_metrics.finish_live_summary()
+
+    output = capsys.readouterr().out
+    assert "hidden" not in output
+    # The summary line is cleared before the message, and drawn again after it
+    before, after = output.split("Slot subscription not available\n")
+    assert before.endswith("\r\033[K")
+    assert after.startswith("\r1 rows")
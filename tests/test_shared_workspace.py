@@ -0,0 +1,66 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from solana_module.anchor_module import shared_workspace
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_workspace, 'anchor_base_path', str(tmp_path))
+    os.makedirs(shared_workspace._template_path())
+    return tmp_path
+
+def _fake_build(commands, returncode=0):
+    # Writes a compiled dependency and the template program where cargo would
+    def run_command(operating_system, command):
+        commands.append((command, os.environ.get('CARGO_TARGET_DIR')))
+        target_path = os.environ['CARGO_TARGET_DIR']
+        for folder, file_name in [('release/deps', 'libanchor_lang.rlib'), ('release/.fingerprint/anchor-lang', 'lib'),
+                                  ('deploy', 'anchor_environment.so'), ('idl', 'anchor_environment.json')]:
+            os.makedirs(os.path.join(target_path, folder), exist_ok=True)
+            with open(os.path.join(target_path, folder, file_name), 'w') as file:
+                file.write(file_name)
+        return SimpleNamespace(returncode=returncode, stdout='', stderr='')
+    return run_command
+
+
+def test_dependencies_are_compiled_once_and_shared_by_every_slot(workspace, monkeypatch):
+    commands = []
+    monkeypatch.setattr(shared_workspace, 'run_command', _fake_build(commands))
+
+    assert shared_workspace.prepare_shared_targets('Linux', 3)
+
+    assert len(commands) == 1
+    assert commands[0][0].endswith("anchor build")
+    assert commands[0][1] == shared_workspace._target_path(0)
+    assert 'CARGO_TARGET_DIR' not in os.environ
+
+    first_dependency = os.path.join(shared_workspace._target_path(0), 'release', 'deps', 'libanchor_lang.rlib')
+    for slot in range(3):
+        target_path = shared_workspace._target_path(slot)
+        dependency = os.path.join(target_path, 'release', 'deps', 'libanchor_lang.rlib')
+        assert os.path.samefile(dependency, first_dependency)
+        assert not os.path.exists(os.path.join(target_path, 'deploy'))
+        assert not os.path.exists(os.path.join(target_path, 'idl'))
+
+    # Fingerprints are rewritten in place by cargo, so each slot has its own
+    fingerprints = [os.path.join(shared_workspace._target_path(slot), 'release', '.fingerprint', 'anchor-lang', 'lib')
+                    for slot in range(2)]
+    assert not os.path.samefile(*fingerprints)
+
+    # Later runs reuse the slots as they are
+    assert shared_workspace.prepare_shared_targets('Linux', 4)
+    assert len(commands) == 1
+    assert os.path.isdir(shared_workspace._target_path(3))
+
+def test_failed_dependency_build_leaves_no_slot(workspace, monkeypatch, capsys):
+    commands = []
+    monkeypatch.setattr(shared_workspace, 'run_command', _fake_build(commands, returncode=101))
+
+    assert not shared_workspace.prepare_shared_targets('Linux', 2)
+
+    assert not os.path.exists(shared_workspace._target_path(0))
+    assert not os.path.exists(shared_workspace._target_path(1))
+    assert "Error compiling the shared dependencies" in capsys.readouterr().out
@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+from solana_module.anchor_module import anchor_utils, trace_compiler
+
+
+class _Keypair:
+    def pubkey(self):
+        return "Provider1111111111111111111111111111111111"
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    # An instruction taking no account (only the system program) and two args, and one with a multi-word signer
+    anchor_base_path = tmp_path / "anchor_module"
+    idl_folder = anchor_base_path / ".anchor_files" / "counter" / "anchor_environment" / "target" / "idl"
+    idl_folder.mkdir(parents=True)
+    (idl_folder / "counter.json").write_text(json.dumps({'instructions': [{
+        'name': 'set',
+        'accounts': [{'name': 'systemProgram', 'isMut': False, 'isSigner': False}],
+        'args': [{'name': 'value', 'type': 'u64'}, {'name': 'enabled', 'type': 'bool'}]
+    }, {
+        'name': 'close',
+        'accounts': [{'name': 'counterOwner', 'isMut': True, 'isSigner': True}],
+        'args': []
+    }]}))
+
+    wallet_folder = tmp_path / "solana_wallets"
+    wallet_folder.mkdir()
+    (wallet_folder / "provider.json").write_text("[]")
+
+    monkeypatch.setattr(trace_compiler, 'anchor_base_path', str(anchor_base_path))
+    monkeypatch.setattr(trace_compiler, 'solana_base_path', str(tmp_path))
+    monkeypatch.setattr(trace_compiler, 'fetch_cluster', lambda program_name: ('Devnet', False))
+    monkeypatch.setattr(anchor_utils, 'load_keypair_from_file', lambda file_path: _Keypair())
+    return tmp_path
+
+def _write_trace(workspace, rows):
+    trace_path = workspace / "trace.csv"
+    trace_path.write_text("\n".join(rows) + "\n")
+    return str(trace_path)
+
+
+def test_valid_trace_is_compiled_into_a_plan(workspace):
+    trace_path = _write_trace(workspace, ["# comment", "1;counter;set;5;true;provider.json;false", "", "S:2",
+                                          "2;counter;set;7;false;provider.json;true"])
+
+    plan_path = trace_compiler.compile_trace(trace_path, ['counter'])
+
+    steps = list(trace_compiler.read_plan(plan_path))
+    assert [step['kind'] for step in steps] == ['instruction', 'slot', 'instruction']
+    assert [step['index'] for step in steps] == [2, 4, 5]
+    assert steps[0]['args'] == {'value': 5, 'enabled': True}
+    assert steps[1]['slots'] == 2
+    assert steps[2]['send'] is True
+    assert steps[0]['writable_keys'] == [_Keypair().pubkey()]
+
+def test_multi_word_signers_are_signer_wallets(workspace):
+    trace_path = _write_trace(workspace, ["1;counter;close;W:provider.json;provider.json;false"])
+
+    plan_path = trace_compiler.compile_trace(trace_path, ['counter'])
+
+    step = next(trace_compiler.read_plan(plan_path))
+    wallet_path = f"{workspace}/solana_wallets/provider.json"
+    assert step['signer_wallets'] == {'counter_owner': wallet_path}
+    assert step['accounts'] == {'counter_owner': _Keypair().pubkey()}
+
+def test_signers_given_as_addresses_are_rejected(workspace, capsys):
+    trace_path = _write_trace(workspace, ["1;counter;close;P:Owner;provider.json;false"])
+
+    assert trace_compiler.compile_trace(trace_path, ['counter']) is None
+    assert "Row 1: account counter_owner must sign the transaction" in capsys.readouterr().out
+
+def test_errors_of_the_whole_trace_are_collected(workspace, capsys):
+    trace_path = _write_trace(workspace, [
+        "1;counter;set;5;true;provider.json;false",
+        "S:two",
+        "2;unknown;set;5;true;provider.json;false",
+        "3;counter;reset;5;true;provider.json;false",
+        "4;counter;set;5",
+        "5;counter;set;five;maybe;provider.json;false",
+        "6;counter;set;5;true;nobody.json;false"
+    ])
+
+    assert trace_compiler.compile_trace(trace_path, ['counter']) is None
+
+    output = capsys.readouterr().out
+    assert "has 7 errors" in output
+    assert "Row 2: invalid number of slots two." in output
+    assert "Row 3: program unknown not initialized yet" in output
+    assert "Row 4: instruction reset not found" in output
+    assert "Row 5: expected 7 columns" in output
+    assert "Row 6: invalid value five for arg value" in output
+    assert "Row 6: invalid value maybe for arg enabled" in output
+    assert "Row 7: provider wallet not found" in output
+
+    # Nothing is left that could be mistaken for a compiled plan
+    plan_folder = os.path.join(trace_compiler.anchor_base_path, ".trace_plans")
+    assert os.listdir(plan_folder) == []
+
+def test_printed_errors_are_limited(workspace, capsys):
+    trace_path = _write_trace(workspace, [f"S:x{i}" for i in range(25)])
+
+    assert trace_compiler.compile_trace(trace_path, ['counter']) is None
+
+    output = capsys.readouterr().out
+    assert "has 25 errors" in output
+    assert output.count("invalid number of slots") == 20
+    assert "... and 5 more" in output
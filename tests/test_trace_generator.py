@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from solana_module.anchor_module import trace_generator
+
+
+@pytest.fixture
+def crowdfund(tmp_path, monkeypatch):
+    # A crowdfund-shaped program: a multi-word signer, a PDA and an integer arg
+    idl_folder = tmp_path / ".anchor_files" / "crowdfund" / "anchor_environment" / "target" / "idl"
+    idl_folder.mkdir(parents=True)
+    (idl_folder / "crowdfund.json").write_text(json.dumps({'instructions': [{
+        'name': 'withdraw',
+        'accounts': [
+            {'name': 'campaignOwner', 'isMut': True, 'isSigner': True},
+            {'name': 'campaignPda', 'isMut': True, 'isSigner': False},
+            {'name': 'systemProgram', 'isMut': False, 'isSigner': False}
+        ],
+        'args': [{'name': 'amount', 'type': 'u8'}]
+    }]}))
+    monkeypatch.setattr(trace_generator, 'anchor_base_path', str(tmp_path))
+    return tmp_path
+
+def _generate(**options):
+    return trace_generator.generate_trace('crowdfund', 5, wallets=['owner.json'], seed=1, **options)
+
+
+def test_multi_word_signers_get_wallets(crowdfund):
+    trace_path = _generate(account_pools={'campaign_pda': ['P:pda']})
+
+    with open(trace_path) as file:
+        rows = [line.strip().split(';') for line in file]
+    assert len(rows) == 5
+    for row in rows:
+        assert row[1:5] == ['crowdfund', 'withdraw', 'W:owner.json', 'P:pda']
+        assert 0 <= int(row[5]) <= 1000
+
+def test_accounts_without_a_pool_are_rejected(crowdfund, capsys):
+    assert _generate() is None
+    assert "no value given for account campaign_pda" in capsys.readouterr().out
+
+def test_ranges_are_checked_against_the_idl_type(crowdfund, capsys):
+    assert _generate(account_pools={'campaign_pda': ['P:pda']}, arg_distributions={'amount': (10, 300)}) is None
+    assert _generate(account_pools={'campaign_pda': ['P:pda']}, arg_distributions={'amount': (10, 3)}) is None
+
+    output = capsys.readouterr().out
+    assert "range 10:300 of arg amount exceeds the u8 range 0:255" in output
+    assert "empty range 10:3 of arg amount" in output
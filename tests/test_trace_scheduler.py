@@ -0,0 +1,84 @@
+import asyncio
+
+from solana_module.anchor_module.trace_scheduler import run_scheduled
+
+
+def _instruction(index, writable=(), readonly=()):
+    return {'kind': 'instruction', 'index': index, 'writable_keys': set(writable), 'readonly_keys': set(readonly)}
+
+def _slot(index):
+    return {'kind': 'slot', 'index': index}
+
+def _run(jobs, max_concurrency, durations=None):
+    durations = durations or dict()
+    events = []
+    results = []
+
+    async def worker(job, semaphore):
+        async with semaphore:
+            events.append(('start', job['index']))
+            await asyncio.sleep(durations.get(job['index'], 0.01))
+            events.append(('end', job['index']))
+        return job['index']
+
+    done = asyncio.run(run_scheduled(jobs, worker, max_concurrency, lambda job, result: results.append(result)))
+    return done, results, events
+
+
+def test_results_are_emitted_in_trace_order():
+    # Later jobs finish first, but results still follow the trace
+    jobs = [_instruction(i, writable=[f"key{i}"]) for i in range(1, 6)]
+    durations = {1: 0.05, 2: 0.04, 3: 0.03, 4: 0.02, 5: 0.01}
+
+    done, results, events = _run(jobs, 5, durations)
+
+    assert done
+    assert results == [1, 2, 3, 4, 5]
+    assert events.index(('end', 5)) < events.index(('end', 1))
+
+def test_jobs_writing_the_same_key_are_serialized():
+    jobs = [_instruction(1, writable=['shared']), _instruction(2, writable=['other']),
+            _instruction(3, writable=['shared']), _instruction(4, readonly=['shared'])]
+
+    done, results, events = _run(jobs, 4, {1: 0.05})
+
+    assert done
+    assert results == [1, 2, 3, 4]
+    # Job 2 does not touch the shared key and runs together with job 1
+    assert events.index(('start', 2)) < events.index(('end', 1))
+    # Job 3 writes the key written by job 1, job 4 reads the key written by job 3
+    assert events.index(('end', 1)) < events.index(('start', 3))
+    assert events.index(('end', 3)) < events.index(('start', 4))
+
+def test_readers_of_a_key_run_concurrently():
+    jobs = [_instruction(1, readonly=['shared']), _instruction(2, readonly=['shared'])]
+
+    done, results, events = _run(jobs, 2, {1: 0.05})
+
+    assert done
+    assert events.index(('start', 2)) < events.index(('end', 1))
+
+def test_slot_job_is_a_barrier():
+    jobs = [_instruction(1, writable=['a']), _instruction(2, writable=['b']), _slot(3),
+            _instruction(4, writable=['c'])]
+
+    done, results, events = _run(jobs, 4, {1: 0.05, 2: 0.03})
+
+    assert done
+    assert results == [1, 2, 3, 4]
+    # The slot job waits for every earlier job, and later jobs wait for it
+    assert events.index(('start', 3)) > max(events.index(('end', 1)), events.index(('end', 2)))
+    assert events.index(('start', 4)) > events.index(('end', 3))
+
+def test_failed_job_stops_the_run():
+    results = []
+
+    async def worker(job, semaphore):
+        async with semaphore:
+            return None if job['index'] == 2 else job['index']
+
+    jobs = [_instruction(i, writable=[f"key{i}"]) for i in range(1, 5)]
+    done = asyncio.run(run_scheduled(jobs, worker, 1, lambda job, result: results.append(result)))
+
+    assert not done
+    assert results == [1]
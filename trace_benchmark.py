@@ -0,0 +1,211 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+from solana_module.anchor_module.trace_generator import generate_trace
+from solana_module.anchor_module.trace_compiler import compile_trace, remove_compiled_plan, hash_plan
+from solana_module.anchor_module.automatic_data_insertion_manager import run_options, execute_plan, \
+    open_results_file, close_results_file
+from solana_module.anchor_module.run_metrics import configure_metrics, reset_metrics, metrics_summary
+from solana_module.anchor_module.rpc_stub_server import start_rpc_stub, stop_rpc_stub
+
+
+# A stage slower than its baseline by more than this fraction makes the run fail
+REGRESSION_THRESHOLD = 0.2
+
+_PERCENTILES = [50, 95, 99]
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def run_benchmark(program_name, n_rows=10000, instructions=None, account_pools=None, seed=0, rpc_latency=0.0,
+                  offline=False, max_concurrency=1, pack=False):
+    # The same seed always produces the same trace, so that runs can be compared
+    benchmark_name = f"benchmark_{program_name}_{n_rows}"
+    trace_path = generate_trace(program_name, n_rows, benchmark_name, instructions, account_pools=account_pools,
+                                seed=seed)
+    if trace_path is None:
+        return None
+
+    try:
+        # Parsing and validation of the whole trace
+        start = time.perf_counter()
+        plan_path = compile_trace(trace_path, [program_name])
+        compile_time = time.perf_counter() - start
+        if plan_path is None:
+            return None
+
+        # Rows go through the runner itself, so that any change to its pipeline shows up in the timings
+        measured = asyncio.run(_run_rows(plan_path, benchmark_name, rpc_latency, offline, max_concurrency, pack))
+        if measured is None:
+            print("The benchmark trace stopped before its last row.")
+            return None
+    finally:
+        # The generated trace and its compiled plan are only needed by this run
+        os.remove(trace_path)
+        remove_compiled_plan(trace_path)
+
+    stages, rows_time = measured
+
+    # Runs with different settings are compared against different baselines
+    benchmark_name += "_offline" if offline else f"_rpc_{rpc_latency}"
+    if max_concurrency > 1:
+        benchmark_name += f"_concurrency_{max_concurrency}"
+    if pack:
+        benchmark_name += "_pack"
+    return {
+        'name': benchmark_name,
+        'rows': n_rows,
+        'compile_rows_per_second': n_rows / compile_time,
+        'rows_per_second': n_rows / rows_time,
+        'stages': stages
+    }
+
+def print_benchmark_report(result):
+    print(f"{result['name']}: {result['rows']} rows")
+    print(f"  Compilation: {result['compile_rows_per_second']:.0f} rows/s")
+    print(f"  Execution:   {result['rows_per_second']:.0f} rows/s")
+    print(f"  {'stage':<18} | " + ' | '.join(f"{f'p{p} [ms]':>10}" for p in _PERCENTILES))
+    for stage, percentiles in result['stages'].items():
+        print(f"  {stage:<18} | " + ' | '.join(f"{percentiles[f'p{p}'] * 1000:>10.3f}" for p in _PERCENTILES))
+
+def compare_with_baseline(result, threshold=REGRESSION_THRESHOLD):
+    baseline = _load_baseline(result['name'])
+    if baseline is None:
+        print(f"No baseline stored for {result['name']}.")
+        return True
+
+    # Throughput must not drop, latencies must not grow, more than the threshold
+    regressions = []
+    for key in ['compile_rows_per_second', 'rows_per_second']:
+        if result[key] < baseline[key] * (1 - threshold):
+            regressions.append(f"{key}: {result[key]:.0f} < {baseline[key]:.0f}")
+    for stage, percentiles in result['stages'].items():
+        if stage not in baseline['stages']:
+            continue
+        for key in ['p50', 'p95']:
+            if percentiles[key] > baseline['stages'][stage][key] * (1 + threshold):
+                regressions.append(f"{stage} {key}: {percentiles[key] * 1000:.3f} ms > "
+                                   f"{baseline['stages'][stage][key] * 1000:.3f} ms")
+
+    for regression in regressions:
+        print(f"  Regression: {regression}")
+    return len(regressions) == 0
+
+def save_baseline(result):
+    path = _baseline_path(result['name'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(result, file, indent=2)
+    print(f"Baseline saved to {path}")
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+async def _run_rows(plan_path, benchmark_name, rpc_latency, offline, max_concurrency, pack):
+    # Requests are answered by a local stand-in after the given latency, so that timings do not depend on a
+    # cluster. Offline, rows are measured without any RPC request
+    stub = None
+    if offline:
+        options = run_options(offline=True, pack=pack)
+    else:
+        stub = await start_rpc_stub(port=0, latency=rpc_latency)
+        options = run_options(pack=pack, rpc_endpoint=stub['endpoint'])
+
+    # The stages are the ones timed by the runner, with the live summary instead of a line per row
+    configure_metrics(live=True)
+    reset_metrics()
+    results_file = open_results_file(benchmark_name, False, hash_plan(plan_path))
+    start = time.perf_counter()
+    try:
+        done = await execute_plan(plan_path, results_file, options, max_concurrency)
+        rows_time = time.perf_counter() - start
+    finally:
+        close_results_file(results_file)
+        os.remove(results_file['path'])
+        if os.path.exists(results_file['checkpoint_path']):
+            os.remove(results_file['checkpoint_path'])
+        if stub is not None:
+            await stop_rpc_stub(stub)
+        configure_metrics(live=False)
+    if not done:
+        return None
+
+    stages = {stage: {f'p{p}': summary[f'p{p}'] for p in _PERCENTILES} for stage, summary in metrics_summary().items()}
+    return stages, rows_time
+
+def _baseline_path(benchmark_name):
+    return f"{anchor_base_path}/.benchmarks/{benchmark_name}.json"
+
+def _load_baseline(benchmark_name):
+    path = _baseline_path(benchmark_name)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the execution trace runner on a synthetic trace.")
+    parser.add_argument('program', help="Name of an initialized program")
+    parser.add_argument('--rows', type=int, default=10000, help="Number of rows of the synthetic trace")
+    parser.add_argument('--instruction', action='append', dest='instructions', help="Instruction to use (repeatable)")
+    parser.add_argument('--account', action='append', default=[], metavar='NAME=P:ADDRESS',
+                        help="Value to use for an account, e.g. a PDA (repeatable)")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help="Allowed regression fraction")
+    parser.add_argument('--update-baseline', action='store_true', help="Store the results as the new baseline")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic trace")
+    parser.add_argument('--rpc-latency', type=float, default=0.0,
+                        help="Seconds after which the local RPC stand-in answers each request")
+    parser.add_argument('--offline', action='store_true', help="Measure rows without any RPC request")
+    parser.add_argument('--concurrency', type=int, default=1, help="Rows executed at the same time")
+    parser.add_argument('--pack', action='store_true', help="Pack consecutive rows in a single transaction")
+    options = parser.parse_args()
+
+    account_pools = dict()
+    for value in options.account:
+        name, key = value.split('=', 1)
+        account_pools.setdefault(name, []).append(key)
+
+    result = run_benchmark(options.program, options.rows, options.instructions, account_pools, options.seed,
+                           options.rpc_latency, options.offline, options.concurrency, options.pack)
+    if result is None:
+        sys.exit(1)
+    print_benchmark_report(result)
+
+    # Exit with an error on regressions, so that it can be used in CI
+    if options.update_baseline:
+        save_baseline(result)
+    elif not compare_with_baseline(result, options.threshold):
+        sys.exit(1)
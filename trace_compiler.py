@@ -0,0 +1,368 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import csv
+import hashlib
+import json
+import os
+import re
+from solana_module.solana_utils import solana_base_path
+from solana_module.anchor_module.anchor_utils import anchor_base_path, convert_type, fetch_cluster, \
+    load_compiled_idl, load_cached_keypair
+from solana_module.anchor_module.run_metrics import measure_stage, log_message
+
+
+_PLAN_VERSION = 1
+_MAX_PRINTED_ERRORS = 20
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def load_or_compile_trace(trace_path, initialized_programs):
+    # Reuse the cached plan if neither the trace nor the files it depends on have changed
+    plan_path, metadata_path = _plan_paths(trace_path)
+    if os.path.exists(plan_path) and os.path.exists(metadata_path):
+        with open(metadata_path, 'r') as file:
+            metadata = json.load(file)
+        if _is_plan_valid(metadata, trace_path, initialized_programs):
+            print(f"Using compiled plan {plan_path}")
+            return plan_path
+
+    return compile_trace(trace_path, initialized_programs)
+
+def compile_trace(trace_path, initialized_programs):
+    plan_path, metadata_path = _plan_paths(trace_path)
+    os.makedirs(os.path.dirname(plan_path), exist_ok=True)
+
+    # Every row is checked before anything is executed, errors are collected for the whole trace
+    context = {'initialized_programs': initialized_programs, 'clusters': dict(), 'dependencies': dict()}
+    errors = []
+    rows = 0
+    temporary_plan_path = f"{plan_path}.tmp"
+    with open(trace_path, 'r') as trace_file, open(temporary_plan_path, 'w') as plan_file:
+        for index, row in enumerate(csv.reader(trace_file), start=1):
+            step = _compile_row(index, row, context, errors)
+            if step is not None:
+                plan_file.write(json.dumps(step) + "\n")
+                rows += 1
+
+    if errors:
+        os.remove(temporary_plan_path)
+        print(f"Execution trace {os.path.basename(trace_path)} has {len(errors)} errors:")
+        for error in errors[:_MAX_PRINTED_ERRORS]:
+            print(f"  - {error}")
+        if len(errors) > _MAX_PRINTED_ERRORS:
+            print(f"  ... and {len(errors) - _MAX_PRINTED_ERRORS} more")
+        return None
+
+    # The metadata is written last, so that an interrupted compilation is never reused
+    os.replace(temporary_plan_path, plan_path)
+    metadata = {
+        'version': _PLAN_VERSION,
+        'trace_hash': _hash_file(trace_path),
+        'initialized_programs': sorted(initialized_programs),
+        'dependencies': context['dependencies'],
+        'rows': rows
+    }
+    with open(metadata_path, 'w') as file:
+        json.dump(metadata, file)
+
+    print(f"Execution trace compiled: {rows} steps written to {plan_path}")
+    return plan_path
+
+def read_plan(plan_path):
+    # Steps are read lazily, so that memory usage does not depend on the trace length
+    with open(plan_path, 'r') as file:
+        for line in file:
+            yield json.loads(line)
+
+def remove_compiled_plan(trace_path):
+    # Drop the compiled files of a trace that is not kept, e.g. a generated benchmark trace
+    plan_path, metadata_path = _plan_paths(trace_path)
+    for path in (plan_path, metadata_path, f"{plan_path}.tmp"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def hash_plan(plan_path):
+    # Identifies the rows of a plan, e.g. to check that a checkpoint belongs to it
+    return _hash_file(plan_path)
+
+def step_to_job(step):
+    # Turn a compiled step into the job executed by the runner
+    if step['kind'] != 'instruction':
+        return dict(step)
+
+    with measure_stage('keypair_loading'):
+        return _step_to_instruction_job(step)
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _step_to_instruction_job(step):
+    from solders.pubkey import Pubkey
+
+    signer_accounts_keypairs = dict()
+    for account, wallet_path in step['signer_wallets'].items():
+        keypair = load_cached_keypair(wallet_path)
+        if keypair is None:
+            log_message(f"Wallet for account {account} not found at path {wallet_path}.")
+            return None
+        signer_accounts_keypairs[account] = keypair
+
+    provider_keypair = load_cached_keypair(step['provider_wallet'])
+    if provider_keypair is None:
+        log_message("Provider wallet not found.")
+        return None
+
+    return {
+        'kind': 'instruction',
+        'index': step['index'],
+        'trace_id': step['trace_id'],
+        'program_name': step['program_name'],
+        'instruction': step['instruction'],
+        'accounts': {account: Pubkey.from_string(key) for account, key in step['accounts'].items()},
+        'args': step['args'],
+        'signer_accounts_keypairs': signer_accounts_keypairs,
+        'provider_keypair': provider_keypair,
+        'cluster': step['cluster'],
+        'is_deployed': step['is_deployed'],
+        'send': step['send'],
+        'writable_keys': set(step['writable_keys']),
+        'readonly_keys': set(step['readonly_keys'])
+    }
+
+def _plan_paths(trace_path):
+    folder = f"{anchor_base_path}/.trace_plans"
+    file_name = os.path.basename(trace_path).removesuffix(".csv")
+    return os.path.join(folder, f"{file_name}.plan.jsonl"), os.path.join(folder, f"{file_name}.plan.json")
+
+def _hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _is_plan_valid(metadata, trace_path, initialized_programs):
+    if metadata.get('version') != _PLAN_VERSION:
+        return False
+    if metadata['initialized_programs'] != sorted(initialized_programs):
+        return False
+
+    # IDLs, Anchor.toml files and wallets used by the plan must not have changed
+    for path, mtime in metadata['dependencies'].items():
+        if not os.path.exists(path) or os.path.getmtime(path) != mtime:
+            return False
+
+    return metadata['trace_hash'] == _hash_file(trace_path)
+
+def _add_dependency(context, path):
+    if path not in context['dependencies'] and os.path.exists(path):
+        context['dependencies'][path] = os.path.getmtime(path)
+
+def _compile_row(index, row, context, errors):
+    # Skip empty rows and comments
+    if not row or not row[0].strip() or row[0].startswith('#'):
+        return None
+
+    # Check if it's a slot waiting command
+    if row[0].startswith("S:"):
+        extracted_key = row[0].removeprefix('S:').strip()
+        try:
+            return {'kind': 'slot', 'index': index, 'slots': int(extracted_key)}
+        except ValueError:
+            errors.append(f"Row {index}: invalid number of slots {extracted_key}.")
+            return None
+
+    # Check if it's a lookup table reference
+    if row[0].startswith("L:"):
+        from solders.pubkey import Pubkey
+        extracted_key = row[0].removeprefix('L:').strip()
+        try:
+            return {'kind': 'lookup_table', 'index': index, 'address': str(Pubkey.from_string(extracted_key))}
+        except Exception as e:
+            errors.append(f"Row {index}: invalid lookup table address {extracted_key}. Error: {e}")
+            return None
+
+    execution_trace = [x.strip() for x in re.split(r"[;,]", row[0])]
+    if len(execution_trace) < 3:
+        errors.append(f"Row {index}: expected trace ID, program and instruction.")
+        return None
+
+    # Manage program
+    trace_id, program_name, instruction = execution_trace[0], execution_trace[1], execution_trace[2]
+    if program_name not in context['initialized_programs']:
+        errors.append(f"Row {index}: program {program_name} not initialized yet (execution trace {trace_id}).")
+        return None
+
+    # Manage instruction
+    idl_file_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
+    _add_dependency(context, idl_file_path)
+    with measure_stage('idl_load'):
+        compiled_instruction = load_compiled_idl(idl_file_path)['instructions'].get(instruction)
+    if compiled_instruction is None:
+        errors.append(f"Row {index}: instruction {instruction} not found for the program {program_name} (execution trace {trace_id}).")
+        return None
+
+    # Trace ID, program, instruction, accounts, args, provider and send flag
+    required_accounts = compiled_instruction['required_accounts']
+    required_args = compiled_instruction['args']
+    expected_columns = 3 + len(required_accounts) + len(required_args) + 2
+    if len(execution_trace) < expected_columns:
+        errors.append(f"Row {index}: expected {expected_columns} columns for {program_name}.{instruction}, but got {len(execution_trace)}.")
+        return None
+
+    row_errors = len(errors)
+    with measure_stage('account_resolution'):
+        accounts, signer_wallets, writable_keys, readonly_keys = _compile_accounts(index, execution_trace,
+                                                                                  compiled_instruction, context, errors)
+    with measure_stage('arg_conversion'):
+        args = _compile_args(index, execution_trace, compiled_instruction, errors)
+
+    # Manage provider
+    i = 3 + len(required_accounts) + len(required_args)
+    provider_wallet = f"{solana_base_path}/solana_wallets/{execution_trace[i].removeprefix('W:')}"
+    provider_keypair = load_cached_keypair(provider_wallet)
+    if provider_keypair is None:
+        errors.append(f"Row {index}: provider wallet not found at path {provider_wallet}.")
+    else:
+        _add_dependency(context, provider_wallet)
+        writable_keys.add(str(provider_keypair.pubkey()))  # The provider pays the fees
+
+    if len(errors) > row_errors:
+        return None
+
+    # The cluster is read once per program
+    if program_name not in context['clusters']:
+        anchor_toml_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/Anchor.toml"
+        _add_dependency(context, anchor_toml_path)
+        context['clusters'][program_name] = fetch_cluster(program_name)
+    cluster, is_deployed = context['clusters'][program_name]
+
+    return {
+        'kind': 'instruction',
+        'index': index,
+        'trace_id': trace_id,
+        'program_name': program_name,
+        'instruction': instruction,
+        'accounts': accounts,
+        'signer_wallets': signer_wallets,
+        'args': args,
+        'provider_wallet': provider_wallet,
+        'cluster': cluster,
+        'is_deployed': is_deployed,
+        'send': execution_trace[i + 1].lower() == 'true',
+        'writable_keys': sorted(writable_keys),
+        'readonly_keys': sorted(readonly_keys)
+    }
+
+def _compile_accounts(index, execution_trace, compiled_instruction, context, errors):
+    accounts = dict()
+    signer_wallets = dict()
+    writable_keys = set()
+    readonly_keys = set()
+
+    i = 3
+    for account in compiled_instruction['required_accounts']:
+        value = execution_trace[i]
+        i += 1
+
+        # If it is a wallet
+        if value.startswith("W:"):
+            wallet_path = f"{solana_base_path}/solana_wallets/{value.removeprefix('W:')}"
+            keypair = load_cached_keypair(wallet_path)
+            if keypair is None:
+                errors.append(f"Row {index}: wallet for account {account} not found at path {wallet_path}.")
+                continue
+            _add_dependency(context, wallet_path)
+            if account in compiled_instruction['signer_accounts']:
+                signer_wallets[account] = wallet_path
+            key = str(keypair.pubkey())
+        # If it is a PDA or a Token Account
+        elif value.startswith("P:") or value.startswith("T:"):
+            # Signers are checked here, since the transaction could not be signed at run time
+            if account in compiled_instruction['signer_accounts']:
+                errors.append(f"Row {index}: account {account} must sign the transaction, a wallet (W:) is required.")
+                continue
+            from solders.pubkey import Pubkey
+            extracted_key = value[2:]
+            try:
+                key = str(Pubkey.from_string(extracted_key))
+            except Exception as e:
+                errors.append(f"Row {index}: invalid key format for account {account}: {extracted_key}. Error: {e}")
+                continue
+        else:
+            errors.append(f"Row {index}: invalid account prefix for account {account}. Expected 'W:', 'P:', or 'T:' but got: {value}")
+            continue
+
+        # Keep track of the accounts touched by the row, to detect conflicts with other rows
+        accounts[account] = key
+        if account in compiled_instruction['writable_accounts']:
+            writable_keys.add(key)
+        else:
+            readonly_keys.add(key)
+
+    return accounts, signer_wallets, writable_keys, readonly_keys
+
+def _compile_args(index, execution_trace, compiled_instruction, errors):
+    args = dict()
+
+    i = 3 + len(compiled_instruction['required_accounts'])
+    for arg in compiled_instruction['args']:
+        value = execution_trace[i]
+        i += 1
+
+        # Manage arrays
+        array_type, array_length = arg['array_type'], arg['array_length']
+        if array_type is not None and array_length is not None:
+            array_values = value.split()
+
+            # Check if array has correct length
+            if len(array_values) != array_length:
+                errors.append(f"Row {index}: expected array of length {array_length} for arg {arg['name']}, but got {len(array_values)}")
+                continue
+
+            # Convert array elements basing on the type
+            converted_values = [convert_type(array_type, array_value) for array_value in array_values]
+            if None in converted_values:
+                errors.append(f"Row {index}: invalid value at index {converted_values.index(None)} for arg {arg['name']}.")
+                continue
+            args[arg['name']] = converted_values
+
+        # Manage classical args
+        else:
+            if arg['checked_type'] is None:
+                errors.append(f"Row {index}: unsupported type for arg {arg['name']}.")
+                continue
+            converted_value = convert_type(arg['checked_type'], value)
+            if converted_value is None:
+                errors.append(f"Row {index}: invalid value {value} for arg {arg['name']} ({arg['checked_type']}).")
+                continue
+            args[arg['name']] = converted_value
+
+    return args
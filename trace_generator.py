@@ -0,0 +1,252 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import argparse
+import os
+import random
+import string
+from solana_module.solana_utils import solana_base_path
+from solana_module.anchor_module.anchor_utils import anchor_base_path, load_compiled_idl
+
+
+# Values used for integer args when no distribution is given, clipped to the range of the IDL type
+DEFAULT_INTEGER_RANGE = (0, 1000)
+DEFAULT_FLOAT_RANGE = (0.0, 1000.0)
+DEFAULT_STRING_LENGTH = 8
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def generate_trace(program_name, n_rows, file_name=None, instructions=None, wallets=None, provider=None,
+                   account_pools=None, arg_distributions=None, slot_wait_every=0, slot_wait_slots=1,
+                   send=False, seed=None):
+    idl_file_path = f'{anchor_base_path}/.anchor_files/{program_name}/anchor_environment/target/idl/{program_name}.json'
+    if not os.path.exists(idl_file_path):
+        print(f"IDL not found for the program {program_name}.")
+        return None
+    compiled_idl = load_compiled_idl(idl_file_path)
+
+    # Instructions are picked uniformly among the selected ones
+    available_instructions = list(compiled_idl['instructions'])
+    if instructions is None:
+        instructions = available_instructions
+    for instruction in instructions:
+        if instruction not in available_instructions:
+            print(f"Instruction {instruction} not found for the program {program_name}.")
+            return None
+
+    # Wallet accounts are picked from the pool, by default all the wallets available
+    if wallets is None:
+        wallets = _find_wallets()
+    if len(wallets) == 0:
+        print("No wallet found.")
+        return None
+    if provider is None:
+        provider = wallets[0]
+
+    templates = [_build_row_template(program_name, instruction, compiled_idl) for instruction in instructions]
+    account_pools = account_pools or dict()
+    arg_distributions = arg_distributions or dict()
+
+    # Every row would fail to compile with a missing PDA or an invalid range, so they are checked first
+    errors = []
+    for template in templates:
+        errors += _check_row_template(template, account_pools, arg_distributions)
+    if errors:
+        print(f"Cannot generate a trace for the program {program_name}:")
+        for error in errors:
+            print(f"  - {error}")
+        return None
+
+    if file_name is None:
+        file_name = f"{program_name}_synthetic_{n_rows}"
+    file_path = f"{anchor_base_path}/execution_traces/{file_name}.csv"
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    rng = random.Random(seed)
+    context = {
+        'rng': rng,
+        'wallets': wallets,
+        'account_pools': account_pools,
+        'arg_distributions': arg_distributions
+    }
+
+    # Rows are written as soon as they are generated, so that huge traces do not need to fit in memory
+    with open(file_path, 'w') as file:
+        for trace_id in range(1, n_rows + 1):
+            template = rng.choice(templates)
+            row = [str(trace_id), program_name, template['instruction']]
+            row += [_generate_account(account, context) for account in template['accounts']]
+            row += [_generate_arg(arg, context) for arg in template['args']]
+            row += [provider, 'true' if send else 'false']
+            file.write(';'.join(row) + '\n')
+
+            if slot_wait_every > 0 and trace_id % slot_wait_every == 0 and trace_id < n_rows:
+                file.write(f"S:{slot_wait_slots}\n")
+
+    print(f"Execution trace with {n_rows} rows written to {file_path}")
+    return file_path
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _find_wallets():
+    path = f"{solana_base_path}/solana_wallets"
+    if not os.path.exists(path):
+        return []
+    return sorted(f for f in os.listdir(path) if f.endswith('.json'))
+
+def _build_row_template(program_name, instruction, compiled_idl):
+    # The IDL is read once per instruction, not once per row
+    compiled_instruction = compiled_idl['instructions'][instruction]
+    for arg in compiled_instruction['args']:
+        if arg['array_type'] is None and arg['checked_type'] == "Unsupported type":
+            print(f"Warning: unsupported type for arg {arg['name']} of {program_name}.{instruction}, "
+                  f"a distribution must be given for it.")
+
+    return {
+        'instruction': instruction,
+        'accounts': compiled_instruction['required_accounts'],
+        'signer_accounts': compiled_instruction['signer_accounts'],
+        'args': compiled_instruction['args']
+    }
+
+def _check_row_template(template, account_pools, arg_distributions):
+    errors = []
+
+    # Only signers are surely wallets, any other account (e.g. a PDA) must be given a pool of values
+    for account in template['accounts']:
+        if account not in template['signer_accounts'] and not account_pools.get(account):
+            errors.append(f"no value given for account {account} of {template['instruction']}, "
+                          f"use --account {account}=P:ADDRESS or W:WALLET")
+
+    # Ranges must not be empty and must fit the IDL type
+    for arg in template['args']:
+        distribution = arg_distributions.get(arg['name'])
+        if not isinstance(distribution, tuple):
+            continue
+        low, high = distribution
+        if low > high:
+            errors.append(f"empty range {low}:{high} of arg {arg['name']}")
+            continue
+        if arg['array_type'] is not None:
+            checked_type, idl_type = arg['array_type'], arg['type']['array'][0]
+        else:
+            checked_type, idl_type = arg['checked_type'], arg['type']
+        if checked_type == "integer":
+            min_value, max_value = _integer_bounds(idl_type)
+            if low < min_value or high > max_value:
+                errors.append(f"range {low}:{high} of arg {arg['name']} exceeds the {idl_type} range "
+                              f"{min_value}:{max_value}")
+
+    return errors
+
+def _generate_account(account, context):
+    # Accounts with a pool (e.g. PDAs) use it, signers get a random wallet
+    pool = context['account_pools'].get(account)
+    if pool:
+        return context['rng'].choice(pool)
+    return f"W:{context['rng'].choice(context['wallets'])}"
+
+def _generate_arg(arg, context):
+    rng = context['rng']
+    distribution = context['arg_distributions'].get(arg['name'])
+
+    # Manage arrays, whose elements are space separated
+    if arg['array_type'] is not None:
+        values = [_generate_value(arg['array_type'], arg['type']['array'][0], distribution, rng)
+                  for _ in range(arg['array_length'])]
+        return ' '.join(values)
+
+    return _generate_value(arg['checked_type'], arg['type'], distribution, rng)
+
+def _generate_value(checked_type, idl_type, distribution, rng):
+    # A distribution can be a list of values, a (low, high) range or a function of the random generator
+    if callable(distribution):
+        return str(distribution(rng))
+    if isinstance(distribution, list):
+        return str(rng.choice(distribution))
+
+    if checked_type == "integer":
+        low, high = distribution if distribution is not None else DEFAULT_INTEGER_RANGE
+        min_value, max_value = _integer_bounds(idl_type)
+        return str(rng.randint(max(low, min_value), min(high, max_value)))
+    elif checked_type == "boolean":
+        return rng.choice(['true', 'false'])
+    elif checked_type == "floating point number":
+        low, high = distribution if distribution is not None else DEFAULT_FLOAT_RANGE
+        return str(rng.uniform(low, high))
+    elif checked_type == "string":
+        # Only alphanumeric characters, since ';' and ',' separate the columns
+        length = distribution if isinstance(distribution, int) else DEFAULT_STRING_LENGTH
+        return ''.join(rng.choices(string.ascii_letters + string.digits, k=length))
+    else:
+        return ''
+
+def _integer_bounds(idl_type):
+    bits = int(idl_type[1:])
+    if idl_type.startswith('u'):
+        return 0, 2 ** bits - 1
+    return -(2 ** (bits - 1)), 2 ** (bits - 1) - 1
+
+def _parse_range(value):
+    low, high = value.split(':')
+    return (float(low), float(high)) if '.' in value else (int(low), int(high))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic execution trace from a program IDL.")
+    parser.add_argument('program', help="Name of an initialized program")
+    parser.add_argument('rows', type=int, help="Number of rows to generate")
+    parser.add_argument('--file-name', help="Name of the trace, without extension")
+    parser.add_argument('--instruction', action='append', dest='instructions', help="Instruction to use (repeatable)")
+    parser.add_argument('--wallet', action='append', dest='wallets', help="Wallet of the pool (repeatable)")
+    parser.add_argument('--provider', help="Wallet paying the fees")
+    parser.add_argument('--account', action='append', default=[], metavar='NAME=P:ADDRESS',
+                        help="Value to use for an account, e.g. a PDA (repeatable)")
+    parser.add_argument('--arg', action='append', default=[], metavar='NAME=LOW:HIGH|V1/V2/...',
+                        help="Range or values to use for an arg (repeatable)")
+    parser.add_argument('--slot-wait-every', type=int, default=0, help="Insert a S: row every N rows")
+    parser.add_argument('--slot-wait-slots', type=int, default=1, help="Number of slots of each S: row")
+    parser.add_argument('--send', action='store_true', help="Mark the rows to be sent")
+    parser.add_argument('--seed', type=int, help="Seed of the random generator")
+    options = parser.parse_args()
+
+    account_pools = dict()
+    for value in options.account:
+        name, key = value.split('=', 1)
+        account_pools.setdefault(name, []).append(key)
+
+    arg_distributions = dict()
+    for value in options.arg:
+        name, distribution = value.split('=', 1)
+        arg_distributions[name] = _parse_range(distribution) if ':' in distribution else distribution.split('/')
+
+    generate_trace(options.program, options.rows, options.file_name, options.instructions, options.wallets,
+                   options.provider, account_pools, arg_distributions, options.slot_wait_every,
+                   options.slot_wait_slots, options.send, options.seed)
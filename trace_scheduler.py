@@ -0,0 +1,133 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import asyncio
+from collections import deque
+
+
+# Number of jobs that can be scheduled ahead of the oldest unfinished one, per concurrency slot
+_WINDOW_PER_SLOT = 4
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+async def run_scheduled(jobs, worker, max_concurrency=1, on_result=None):
+    # Jobs are dicts produced in trace order. Slot jobs ('kind' == 'slot') act as barriers, while
+    # instruction jobs only wait for earlier jobs touching the same accounts, as described by
+    # their 'writable_keys' and 'readonly_keys' sets. Results are passed in order to on_result(job, result).
+    # A None job or a None result stops the run.
+    semaphore = asyncio.Semaphore(max_concurrency)
+    window = 1 if max_concurrency == 1 else max_concurrency * _WINDOW_PER_SLOT
+
+    last_writers = dict()  # Account key -> task of the last job writing it
+    readers = dict()  # Account key -> tasks reading it after the last write
+    barrier = None  # Task of the last slot job
+    pending = deque()  # Scheduled jobs and tasks whose result has not been emitted yet
+
+    try:
+        for job in jobs:
+            if job is None:
+                return False
+
+            # Find the jobs that must be completed before this one
+            if job['kind'] == 'slot':
+                dependencies = [task for _, task in pending]
+            else:
+                dependencies = _collect_dependencies(job, last_writers, readers)
+                if barrier is not None:
+                    dependencies.append(barrier)
+
+            task = asyncio.create_task(_run_job(job, worker, semaphore, dependencies))
+            if job['kind'] == 'slot':
+                barrier = task
+            else:
+                _register_accesses(job, task, last_writers, readers)
+            pending.append((job, task))
+
+            # Emit finished results in order, waiting if too many jobs are scheduled ahead
+            if not await _emit_results(pending, on_result, window):
+                return False
+
+        return await _emit_results(pending, on_result, 0)
+
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _collect_dependencies(job, last_writers, readers):
+    dependencies = []
+
+    # Writing an account conflicts with both earlier writers and readers
+    for key in job['writable_keys']:
+        if key in last_writers:
+            dependencies.append(last_writers[key])
+        dependencies.extend(readers.get(key, []))
+
+    # Reading an account only conflicts with earlier writers
+    for key in job['readonly_keys']:
+        if key in last_writers:
+            dependencies.append(last_writers[key])
+
+    return [task for task in dependencies if not _succeeded(task)]
+
+def _register_accesses(job, task, last_writers, readers):
+    for key in job['writable_keys']:
+        last_writers[key] = task
+        readers.pop(key, None)
+
+    for key in job['readonly_keys'] - job['writable_keys']:
+        key_readers = [reader for reader in readers.get(key, []) if not _succeeded(reader)]
+        key_readers.append(task)
+        readers[key] = key_readers
+
+def _succeeded(task):
+    # Tasks that completed successfully no longer need to be waited for
+    return task.done() and not task.cancelled() and task.exception() is None and task.result() is not None
+
+async def _run_job(job, worker, semaphore, dependencies):
+    # Do not run a job if one of the jobs it depends on failed
+    for dependency in dependencies:
+        if await dependency is None:
+            return None
+
+    return await worker(job, semaphore)
+
+async def _emit_results(pending, on_result, window):
+    while pending and (pending[0][1].done() or len(pending) >= window):
+        job, task = pending[0]
+        result = await task
+        pending.popleft()
+        if result is None:
+            return False
+        if on_result is not None:
+            on_result(job, result)
+
+    return True
@@ -21,51 +21,67 @@
 # THE SOFTWARE.
 
 
-import sys
-from pathlib import Path
-import importlib
-from solders.message import MessageV0
-from solders.transaction import VersionedTransaction
-from solders.transaction import Transaction
-from solana_module.anchor_module.anchor_utils import anchor_base_path
+from solana_module.anchor_module.instruction_registry import get_instruction_builder
+from solana_module.anchor_module.blockhash_provider import get_recent_blockhash
+from solana_module.anchor_module.fee_model import estimate_transaction_fee, DEFAULT_LAMPORTS_PER_SIGNATURE
+from solana_module.anchor_module.run_metrics import measure_stage, log_message
+
+
+# Maximum size of a serialized transaction
+PACKET_DATA_SIZE = 1232
 
 
 # ====================================================
 # PUBLIC FUNCTIONS
 # ====================================================
 
-from solders.message import MessageV0
-from solders.transaction import VersionedTransaction
-
-async def build_transaction(program_name, instruction, accounts, args, signer_account_keypairs, client, provider):
+async def build_transaction(program_name, instruction, accounts, args, signer_account_keypairs, client, provider,
+                            recent_blockhash=None, lookup_tables=()):
     # Ottieni la funzione da anchorpy
-    function = _import_function(program_name, instruction)
-    ix = _prepare_function(accounts, args, function)
-
-    # Ottieni blockhash
-    resp = await client.get_latest_blockhash()
-    recent_blockhash = resp.value.blockhash
-
-    # Costruisci MessageV0 usando try_compile
-    message = MessageV0.try_compile(
-        payer=provider.wallet.payer.pubkey(),
-        instructions=[ix],
-        address_lookup_table_accounts=[],
-        recent_blockhash=recent_blockhash
-    )
+    ix = build_instruction(program_name, instruction, accounts, args)
+
+    return await build_packed_transaction([ix], list(signer_account_keypairs.values()), client, provider,
+                                          recent_blockhash, lookup_tables)
 
-    # Ottieni tutti i firmatari (payer + altri)
-    keypairs = list(signer_account_keypairs.values())
-    if provider.wallet.payer not in keypairs:
-        keypairs.insert(0, provider.wallet.payer)
+def build_instruction(program_name, instruction, accounts, args):
+    with measure_stage('build_instruction'):
+        function = get_instruction_builder(program_name, instruction)
+        return _prepare_function(accounts, args, function)
 
-    # Costruisci la transazione versionata
-    tx = VersionedTransaction(message, keypairs)
+async def build_packed_transaction(instructions, signer_keypairs, client, provider, recent_blockhash=None,
+                                   lookup_tables=()):
+    # Ottieni blockhash (cached, shared between transactions), unless one is given
+    if recent_blockhash is None:
+        with measure_stage('blockhash'):
+            recent_blockhash = await get_recent_blockhash(client)
+
+    from solders.transaction import VersionedTransaction
+
+    with measure_stage('compile_and_sign'):
+        # Costruisci MessageV0 usando try_compile
+        message = _compile_message(instructions, provider.wallet.payer, recent_blockhash, lookup_tables)
+
+        # Ottieni tutti i firmatari (payer + altri)
+        keypairs = _collect_signers(signer_keypairs, provider.wallet.payer)
+
+        # Costruisci la transazione versionata
+        tx = VersionedTransaction(message, keypairs)
 
     return tx
 
+def estimate_packed_transaction_size(instructions, payer, lookup_tables=()):
+    # Size of the transaction once signed, computed with placeholder blockhash and signatures
+    from solders.signature import Signature
+    from solders.transaction import VersionedTransaction
+
+    message = _compile_message(instructions, payer, placeholder_blockhash(), lookup_tables)
+    signatures = [Signature.default()] * message.header.num_required_signatures
+    return measure_transaction_size(VersionedTransaction.populate(message, signatures))
+
 
 def measure_transaction_size(tx):
+    from solders.transaction import Transaction, VersionedTransaction
+
     # Check transaction type
     if isinstance(tx, Transaction):
         # Compute transaction size
@@ -80,7 +96,9 @@ def measure_transaction_size(tx):
     size_in_bytes = len(serialized_tx)
     return size_in_bytes
 
-async def compute_transaction_fees(client, tx):
+async def compute_transaction_fees(client, tx, offline=False, signature_lamports=DEFAULT_LAMPORTS_PER_SIGNATURE):
+    from solders.transaction import Transaction, VersionedTransaction
+
     # Check transaction type
     if isinstance(tx, Transaction):
         tx_message = tx.compile_message()
@@ -89,16 +107,28 @@ async def compute_transaction_fees(client, tx):
     else:
         return None
 
+    # Compute fee locally, without querying the cluster
+    if offline:
+        with measure_stage('fee_estimate'):
+            return estimate_transaction_fee(tx_message, signature_lamports)
+
     # Compute fee from message
-    response = await client.get_fee_for_message(tx_message)
+    with measure_stage('fee_rpc'):
+        response = await client.get_fee_for_message(tx_message)
     if response.value:
         return response.value
     else:
-        print("Failed to fetch fee information")
+        log_message("Failed to fetch fee information")
         return None
 
-async def send_transaction(provider, tx):
-    return await provider.send(tx)
+def placeholder_blockhash():
+    # Blockhash used to build transactions without a cluster connection. It does not change the transaction size
+    from solders.hash import Hash
+    return Hash.default()
+
+async def send_transaction(provider, tx, opts=None):
+    with measure_stage('send'):
+        return await provider.send(tx, opts)
 
 
 
@@ -107,34 +137,26 @@ async def send_transaction(provider, tx):
 # PRIVATE FUNCTIONS
 # ====================================================
 
-def _import_function(program_name: str, instruction_name: str):
-    # Update absolute path in the root folder of the package
-    program_root = Path(f"{anchor_base_path}/.anchor_files/{program_name}").resolve()
-
-    if not program_root.exists():
-        raise FileNotFoundError(f"The folder {program_root} does not exist. Check program name")
-
-    # Path to the instruction
-    module_path = program_root / "anchorpy_files" / "instructions" / f"{instruction_name}.py"
+def _compile_message(instructions, payer, recent_blockhash, lookup_tables=()):
+    from solders.message import MessageV0
 
-    if not module_path.exists():
-        raise FileNotFoundError(f"The file {module_path} does not exist. Verify instruction name.")
-
-    # Add program root to sys.path to enable relative imports
-    if str(program_root) not in sys.path:
-        sys.path.append(str(program_root))
-
-    # Complete name of the module to import
-    module_name = f"anchorpy_files.instructions.{instruction_name}"
-
-    # Dynamic import of the module
-    module = importlib.import_module(module_name)
-
-    # Verify that the function exists
-    if not hasattr(module, instruction_name):
-        raise AttributeError(f"The module {module_name} does not contain the function {instruction_name}.")
+    # Keys found in the lookup tables (except signers and invoked programs) are referenced by index
+    return MessageV0.try_compile(
+        payer=payer.pubkey(),
+        instructions=instructions,
+        address_lookup_table_accounts=list(lookup_tables),
+        recent_blockhash=recent_blockhash
+    )
 
-    return getattr(module, instruction_name)
+def _collect_signers(signer_keypairs, payer):
+    # Payer first, then every other signer once
+    keypairs = [payer]
+    pubkeys = {payer.pubkey()}
+    for keypair in signer_keypairs:
+        if keypair.pubkey() not in pubkeys:
+            keypairs.append(keypair)
+            pubkeys.add(keypair.pubkey())
+    return keypairs
 
 def _prepare_function(accounts, args, function):
     if accounts:
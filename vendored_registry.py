@@ -0,0 +1,109 @@
+# MIT License
+#
+# Copyright (c) 2025 Manuel Boi - Università degli Studi di Cagliari
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import hashlib
+import os
+import shutil
+from solana_module.solana_utils import run_command
+from solana_module.anchor_module.anchor_utils import anchor_base_path
+
+
+# Crates source replacement, written in each program workspace so that cargo never contacts crates.io
+_CARGO_CONFIG = """[source.crates-io]
+replace-with = "vendored-sources"
+
+[source.vendored-sources]
+directory = "{vendor_path}"
+
+[net]
+offline = true
+"""
+
+
+# ====================================================
+# PUBLIC FUNCTIONS
+# ====================================================
+
+def create_resolver_crate():
+    # Crate whose Cargo.toml receives every dependency a program may need, returns the Cargo.toml path
+    resolver_path = _resolver_path()
+    os.makedirs(os.path.join(resolver_path, 'src'), exist_ok=True)
+    with open(os.path.join(resolver_path, 'src', 'lib.rs'), 'w') as file:
+        file.write('')
+    cargo_toml_path = os.path.join(resolver_path, 'Cargo.toml')
+    with open(cargo_toml_path, 'w') as file:
+        file.write('[package]\nname = "vendored_resolver"\nversion = "0.1.0"\nedition = "2021"\n\n[dependencies]\n')
+    return cargo_toml_path
+
+def vendor_dependencies(operating_system):
+    # Resolve the lockfile and download every crate in it, the only step needing the network
+    vendor_path = _vendor_path()
+    commands = [
+        f"cd {_resolver_path()}",
+        "cargo generate-lockfile",
+        f"cargo vendor --versioned-dirs {vendor_path}.tmp"
+    ]
+    print("Vendoring dependencies, this may take a while...")
+    result = run_command(operating_system, " && ".join(commands))
+    if result is None or not os.path.isdir(f"{vendor_path}.tmp"):
+        print("Error vendoring dependencies.")
+        if result is not None and result.stderr:
+            print(result.stderr)
+        shutil.rmtree(f"{vendor_path}.tmp", ignore_errors=True)
+        return False
+
+    shutil.rmtree(vendor_path, ignore_errors=True)
+    os.replace(f"{vendor_path}.tmp", vendor_path)
+    shutil.copy2(os.path.join(_resolver_path(), 'Cargo.lock'), _lockfile_path())
+    print(f"Dependencies vendored in {vendor_path}")
+    return True
+
+def is_registry_vendored():
+    return os.path.isdir(_vendor_path()) and os.path.exists(_lockfile_path())
+
+def configure_offline_build(program_name):
+    # Point cargo to the vendored crates and start from the vendored lockfile
+    environment_path = f"{anchor_base_path}/.anchor_files/{program_name}/anchor_environment"
+    os.makedirs(os.path.join(environment_path, '.cargo'), exist_ok=True)
+    with open(os.path.join(environment_path, '.cargo', 'config.toml'), 'w') as file:
+        file.write(_CARGO_CONFIG.format(vendor_path=os.path.abspath(_vendor_path())))
+    shutil.copy2(_lockfile_path(), os.path.join(environment_path, 'Cargo.lock'))
+
+def vendored_lockfile_hash():
+    with open(_lockfile_path(), 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+# ====================================================
+# PRIVATE FUNCTIONS
+# ====================================================
+
+def _resolver_path():
+    return f"{anchor_base_path}/.anchor_files/.vendor/resolver"
+
+def _vendor_path():
+    return f"{anchor_base_path}/.anchor_files/.vendor/crates"
+
+def _lockfile_path():
+    return f"{anchor_base_path}/.anchor_files/.vendor/Cargo.lock"